@@ -1,14 +1,17 @@
 import os
 
-from app import create_app, db
-from app.services.posts import ensure_flair_column
+from app import create_app
+from app.migrations import prepare_database
+from app.services.jobs import start_worker
 
 app = create_app()
 
 if __name__ == "__main__":
     with app.app_context():
-        db.create_all()
-        ensure_flair_column()
+        prepare_database()
+    # The reloader runs the app in a child process; only that one processes jobs.
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_worker(app)
     app.run(
         debug=True,
         host=os.environ.get("FLASK_RUN_HOST", "0.0.0.0"),
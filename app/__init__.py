@@ -1,13 +1,24 @@
 import os
+from typing import Optional
 
 from flask import Flask
 from flask_wtf.csrf import generate_csrf
+from werkzeug.middleware.proxy_fix import ProxyFix
 
+from .config import Config
+from .database import configure_engine, engine_options
 from .extensions import csrf, db, login_manager
+from .services.assets import register_assets
+from .services.cache import init_caches
+from .services.compression import register_compression
+from .services.hashing import init_password_hasher
+from .services.identity import load_identity
+from .services.ratelimit import init_rate_limiter
+from .services.sqlstats import register_sql_instrumentation
 from .services.monitoring import configure_application_insights, register_monitoring
 
 
-def create_app():
+def create_app(config: Optional[dict] = None):
     base_dir = os.path.abspath(os.path.dirname(__file__))
     templates_path = os.path.join(base_dir, "..", "templates")
     static_path = os.path.join(base_dir, "..", "static")
@@ -16,34 +27,48 @@ def create_app():
         __name__, template_folder=os.path.abspath(templates_path), static_folder=os.path.abspath(static_path)
     )
 
-    app.config["SECRET_KEY"] = "888888888188881"
-    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///site.db"
-    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config.from_object(Config)
+    app.config.from_prefixed_env()
+    if os.environ.get("DATABASE_URL"):
+        app.config["SQLALCHEMY_DATABASE_URI"] = os.environ["DATABASE_URL"]
+    if config:
+        app.config.update(config)
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config))
+    if app.config["TRUSTED_PROXY_COUNT"]:
+        hops = app.config["TRUSTED_PROXY_COUNT"]
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
 
     csrf.init_app(app)
     db.init_app(app)
+    with app.app_context():
+        configure_engine(db.engine, app.config)
+        register_sql_instrumentation(app, db.engine)
     login_manager.init_app(app)
     login_manager.login_view = "login"
     login_manager.login_message_category = "danger"
-
-    from .models import User  # noqa: WPS433
-
-    @login_manager.user_loader
-    def load_user(user_id):
-        return User.query.get(int(user_id))
+    login_manager.user_loader(load_identity)
+    init_caches(app)
+    init_password_hasher(app)
+    init_rate_limiter(app)
 
     @app.context_processor
     def inject_csrf_token():
         return dict(csrf_token=generate_csrf)
 
+    from .cli import register_commands
     from .routes import register_routes
 
-    register_routes(app)
+    # Registered first so its after_request hook runs last and sees the final,
+    # compressed response.
     register_monitoring(app)
+    register_compression(app)
+    register_assets(app)
+    register_routes(app)
+    register_commands(app)
     configure_application_insights(app)
     return app
 
 
-from .models import Comment, Post, User  # noqa: E402
+from .models import Comment, Job, Post, User  # noqa: E402
 
-__all__ = ["create_app", "db", "login_manager", "csrf", "User", "Post", "Comment"]
+__all__ = ["create_app", "db", "login_manager", "csrf", "User", "Post", "Comment", "Job"]
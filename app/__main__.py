@@ -0,0 +1,25 @@
+import argparse
+import os
+
+from .server import serve, serve_dev
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app", description="Fantasy Forum")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="run the web server")
+    serve_parser.add_argument("--dev", action="store_true", help="single-process debug server with reloader")
+    serve_parser.add_argument("--bind", help="host:port to listen on (default $FLASK_RUN_HOST:$PORT)")
+    serve_parser.add_argument("--workers", type=int, help="worker processes (default $WEB_CONCURRENCY or 2*CPU+1)")
+    serve_parser.add_argument("--threads", type=int, help="threads per worker (default $GUNICORN_THREADS or 4)")
+    args = parser.parse_args(argv)
+
+    if args.dev:
+        serve_dev(os.environ.get("FLASK_RUN_HOST", "127.0.0.1"), int(os.environ.get("PORT", 5000)))
+    else:
+        serve(bind=args.bind, workers=args.workers, threads=args.threads)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
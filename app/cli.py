@@ -0,0 +1,89 @@
+import gzip
+import time
+
+import click
+
+from .migrations import prepare_database
+from .services.assets import load_manifest
+from .services.compression import precompress_directory
+from .services.importer import import_stream
+from .services.jobs import JobWorker, run_pending
+from .services.posts import recount_comments
+
+
+def register_commands(app):
+    """Register maintenance commands on the ``flask`` CLI."""
+
+    @app.cli.command("repair-comment-counts")
+    def repair_comment_counts():  # noqa: WPS430
+        """Recompute the stored comment count of every post."""
+
+        fixed = recount_comments()
+        click.echo(f"Repaired comment counts on {fixed} post(s).")
+
+    @app.cli.command("db-upgrade")
+    def db_upgrade():  # noqa: WPS430
+        """Create missing tables and apply pending schema migrations."""
+
+        applied = prepare_database()
+        if applied:
+            click.echo(f"Applied migrations: {', '.join(str(v) for v in applied)}")
+        else:
+            click.echo("Database schema is up to date.")
+
+    @app.cli.command("precompress-static")
+    def precompress_static():  # noqa: WPS430
+        """Write .gz (and .br) copies of compressible files under static/."""
+
+        written = precompress_directory(app.static_folder, app.config["COMPRESS_MIN_SIZE"])
+        click.echo(f"Wrote {len(written)} precompressed file(s).")
+
+    @app.cli.command("build-assets")
+    def build_assets():  # noqa: WPS430
+        """Fingerprint static/ into static/dist/ and write the asset manifest."""
+
+        manifest = load_manifest(app, build=True)
+        click.echo(f"Fingerprinted {len(manifest)} asset(s) into static/dist/.")
+
+    @app.cli.command("import-posts")
+    @click.argument("source", type=click.File("rb"))
+    @click.option("--batch-size", type=int, help="rows per transaction (default IMPORT_BATCH_SIZE)")
+    def import_posts(source, batch_size):  # noqa: WPS430
+        """Import posts and nested comments from an NDJSON file ("-" for stdin)."""
+
+        config = dict(app.config)
+        if batch_size:
+            config["IMPORT_BATCH_SIZE"] = batch_size
+        if source.name.endswith(".gz"):
+            source = gzip.GzipFile(fileobj=source, mode="rb")
+        report = import_stream(source, config).to_dict()
+        for error in report["errors"]:
+            click.echo(f"line {error['line']}: {error['error']}", err=True)
+        if report["errors_truncated"]:
+            click.echo(f"... {report['failed'] - len(report['errors'])} more error(s)", err=True)
+        click.echo(
+            f"Imported {report['posts']} post(s) and {report['comments']} comment(s); "
+            f"{report['failed']} record(s) failed."
+        )
+        if report["input_error"]:
+            raise click.ClickException(report["input_error"])
+
+    @app.cli.command("run-jobs")
+    @click.option("--once", is_flag=True, help="run the jobs that are due now, then exit")
+    @click.option("--threads", type=int, help="worker threads (default JOBS_WORKER_THREADS)")
+    def run_jobs(once, threads):  # noqa: WPS430
+        """Process background jobs until interrupted."""
+
+        if once:
+            outcomes = run_pending(limit=10_000)
+            summary = ", ".join(f"{count} {outcome}" for outcome, count in sorted(outcomes.items()))
+            click.echo(summary or "No jobs due.")
+            return
+        threads = threads or app.config["JOBS_WORKER_THREADS"]
+        worker = JobWorker(app, threads, app.config["JOBS_POLL_INTERVAL"]).start()
+        click.echo(f"Processing jobs with {worker.threads} thread(s); Ctrl+C to stop.")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            worker.stop()
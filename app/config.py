@@ -0,0 +1,127 @@
+class Config:
+    """Default settings.
+
+    ``create_app`` overlays any ``FLASK_``-prefixed environment variable on top
+    of these (``FLASK_DB_POOL_SIZE=20``, ``FLASK_SQLITE_SYNCHRONOUS='"FULL"'``)
+    and reads ``DATABASE_URL`` as the database URI.
+    """
+
+    SECRET_KEY = "888888888188881"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///site.db"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Connection pool, used for file-backed SQLite and server databases alike.
+    DB_POOL_SIZE = 5
+    DB_MAX_OVERFLOW = 10
+    DB_POOL_TIMEOUT = 30
+    DB_POOL_RECYCLE = 1800
+    # Seconds a SQLite connection waits on a locked database before failing.
+    DB_CONNECT_TIMEOUT = 15
+
+    # PRAGMAs applied to every new SQLite connection; None skips one.
+    SQLITE_JOURNAL_MODE = "WAL"
+    SQLITE_SYNCHRONOUS = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS = 5000
+    SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE = -64 * 1024  # negative means KiB, so 64 MiB
+
+    # Seconds a cached /api/stats payload may be served when no write invalidated it.
+    STATS_CACHE_TTL = 30
+
+    # Full-page cache for anonymous visitors (home, post detail, profiles).
+    PAGE_CACHE_ENABLED = True
+    PAGE_CACHE_MAX_ENTRIES = 512
+    PAGE_CACHE_TTL = 60
+
+    # Password KDF, as accepted by werkzeug.security.generate_password_hash. Stored
+    # hashes made with other parameters are upgraded on the next successful login.
+    PASSWORD_HASH_METHOD = "scrypt:32768:8:1"
+    # Dedicated hashing threads, extra jobs allowed to wait for them (beyond that,
+    # sign-ins fail fast with 503), and the longest a request waits for its result.
+    PASSWORD_HASH_WORKERS = 2
+    PASSWORD_HASH_QUEUE = 16
+    PASSWORD_HASH_TIMEOUT = 10.0
+
+    # Token-bucket budgets per client IP, and per user id when logged in, for the
+    # search, export and write endpoints. Each rule is "<count>/<second|minute|hour>".
+    # RATELIMIT_STORAGE_URI is "memory://" (per process) or "sqlite:///<path>"
+    # (shared by all worker processes on the host).
+    RATELIMIT_ENABLED = True
+    RATELIMIT_STORAGE_URI = "memory://"
+    RATELIMIT_MAX_KEYS = 10000
+    RATELIMIT_RULES = {
+        "search": "60/minute",
+        "export": "6/minute",
+        "write": "30/minute",
+    }
+
+    # Number of reverse proxies in front of the app whose X-Forwarded-For and
+    # X-Forwarded-Proto headers are trusted (0 uses the socket peer address).
+    TRUSTED_PROXY_COUNT = 0
+
+    # Live Server-Sent Events (/api/events): each response returns the events
+    # since the client's Last-Event-ID and ends; browsers reconnect after
+    # SSE_POLL_INTERVAL seconds. At most SSE_BATCH_SIZE posts and as many
+    # comments are sent per response.
+    SSE_POLL_INTERVAL = 5.0
+    SSE_BATCH_SIZE = 100
+
+    # Background jobs (app.services.jobs): worker threads per process and how
+    # often an idle worker polls, attempts before a job is dead-lettered, retry
+    # backoff (base doubles per attempt, capped, with jitter), how long a running
+    # job may go before another worker reclaims it, and how long done jobs are kept.
+    JOBS_WORKER_ENABLED = True
+    JOBS_WORKER_THREADS = 2
+    JOBS_POLL_INTERVAL = 0.5
+    JOBS_MAX_ATTEMPTS = 5
+    JOBS_BACKOFF_BASE = 2.0
+    JOBS_BACKOFF_MAX = 300.0
+    JOBS_LEASE_SECONDS = 300
+    JOBS_RETENTION_SECONDS = 86400
+
+    # Bulk NDJSON import (POST /api/import/posts, `flask import-posts`). Only the
+    # usernames listed in IMPORT_ADMINS may use the API endpoint.
+    IMPORT_ADMINS = ()
+    IMPORT_BATCH_SIZE = 1000
+    IMPORT_MAX_ERRORS = 100
+    IMPORT_MAX_LINE_BYTES = 16 * 1024 * 1024
+
+    # Per-request SQL instrumentation: query count/time histograms, a warning when
+    # one statement repeats SQL_N_PLUS_ONE_THRESHOLD times (likely N+1), the
+    # app.sql.slow log for statements over SQL_SLOW_QUERY_MS, and optionally a
+    # Server-Timing response header.
+    SQL_INSTRUMENTATION_ENABLED = True
+    SQL_N_PLUS_ONE_THRESHOLD = 10
+    SQL_SLOW_QUERY_MS = 200
+    SQL_SERVER_TIMING = False
+
+    # Process-level cache of logged-in identities (id, username) for the user_loader.
+    IDENTITY_CACHE_MAX_ENTRIES = 1024
+    IDENTITY_CACHE_TTL = 60
+
+    # Negotiated gzip/brotli compression of buffered responses.
+    COMPRESS_ENABLED = True
+    COMPRESS_MIN_SIZE = 500
+    COMPRESS_LEVEL = 6
+    COMPRESS_MIMETYPES = (
+        "text/html",
+        "text/css",
+        "text/plain",
+        "text/javascript",
+        "application/javascript",
+        "application/json",
+        "application/x-ndjson",
+        "image/svg+xml",
+    )
+
+    # Fingerprint static/ into static/dist/ when the app starts (the Docker build
+    # and `python -m app serve` always do; see `flask build-assets`).
+    ASSETS_BUILD_ON_STARTUP = False
+
+    # Azure Application Insights tracing is off unless a connection string is set
+    # (also read from the standard APPLICATIONINSIGHTS_CONNECTION_STRING variable).
+    APPLICATIONINSIGHTS_CONNECTION_STRING = None
+    TRACING_SAMPLE_RATE = 0.1
+    TRACING_QUEUE_SIZE = 2048
+    TRACING_BATCH_SIZE = 100
+    TRACING_EXPORT_INTERVAL = 5.0
@@ -0,0 +1,63 @@
+"""Engine options and per-connection setup derived from the app config."""
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+_SQLITE_PRAGMAS = (
+    ("journal_mode", "SQLITE_JOURNAL_MODE"),
+    ("synchronous", "SQLITE_SYNCHRONOUS"),
+    ("busy_timeout", "SQLITE_BUSY_TIMEOUT_MS"),
+    ("mmap_size", "SQLITE_MMAP_SIZE"),
+    ("cache_size", "SQLITE_CACHE_SIZE"),
+)
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and (
+        url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+    )
+
+
+def engine_options(config) -> dict:
+    """Build ``SQLALCHEMY_ENGINE_OPTIONS`` for the configured database URI."""
+
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    options = {"pool_pre_ping": True}
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"timeout": config["DB_CONNECT_TIMEOUT"]}
+        if _is_memory_sqlite(url):
+            # Flask-SQLAlchemy pins in-memory databases to one shared connection.
+            return options
+    else:
+        options["pool_recycle"] = config["DB_POOL_RECYCLE"]
+    options.update(
+        pool_size=config["DB_POOL_SIZE"],
+        max_overflow=config["DB_MAX_OVERFLOW"],
+        pool_timeout=config["DB_POOL_TIMEOUT"],
+    )
+    return options
+
+
+def sqlite_pragmas(config) -> list:
+    return [
+        (pragma, config[key])
+        for pragma, key in _SQLITE_PRAGMAS
+        if config.get(key) is not None
+    ]
+
+
+def configure_engine(engine, config) -> None:
+    """Apply the configured PRAGMAs to every new connection of a file-backed SQLite engine."""
+
+    if engine.url.get_backend_name() != "sqlite" or _is_memory_sqlite(engine.url):
+        return
+    pragmas = sqlite_pragmas(config)
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):  # noqa: WPS430
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma, value in pragmas:
+                cursor.execute(f"PRAGMA {pragma}={value}")
+        finally:
+            cursor.close()
@@ -0,0 +1,142 @@
+"""Versioned schema migrations.
+
+``db.create_all()`` builds a fresh schema straight from the models. The
+migrations below bring an existing database up to the same shape. Each one is
+idempotent, so running it against a freshly created schema only records its
+version. Applied versions are kept in the ``schema_migrations`` table.
+"""
+
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import inspect, select, text
+
+from .extensions import db
+from .models import Comment, Job, Post
+from .services.search import install_search_index
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable
+
+
+MIGRATIONS: List[Migration] = []
+
+schema_migrations = db.Table(
+    "schema_migrations",
+    db.Column("version", db.Integer, primary_key=True, autoincrement=False),
+    db.Column("description", db.String(200), nullable=False),
+    db.Column("applied_at", db.DateTime, nullable=False),
+)
+
+
+def migration(version: int, description: str):
+    def register(fn):
+        MIGRATIONS.append(Migration(version, description, fn))
+        return fn
+
+    return register
+
+
+def _columns(connection, table: str):
+    return {col["name"] for col in inspect(connection).get_columns(table)}
+
+
+def _create_index(connection, table, name: str) -> None:
+    index = next(ix for ix in table.indexes if ix.name == name)
+    index.create(connection, checkfirst=True)
+
+
+@migration(1, "add post.flair")
+def _add_post_flair(connection):
+    if "flair" not in _columns(connection, "post"):
+        connection.execute(
+            text("ALTER TABLE post ADD COLUMN flair VARCHAR(20) NOT NULL DEFAULT 'OTHER'")
+        )
+
+
+@migration(2, "add post.comment_count and backfill it")
+def _add_post_comment_count(connection):
+    if "comment_count" not in _columns(connection, "post"):
+        connection.execute(
+            text("ALTER TABLE post ADD COLUMN comment_count INTEGER NOT NULL DEFAULT 0")
+        )
+        connection.execute(
+            text(
+                "UPDATE post SET comment_count = "
+                "(SELECT COUNT(*) FROM comment WHERE comment.post_id = post.id)"
+            )
+        )
+
+
+@migration(3, "index feed, profile and comment list access paths")
+def _add_hot_path_indexes(connection):
+    _create_index(connection, Post.__table__, "ix_post_date_posted_id")
+    _create_index(connection, Post.__table__, "ix_post_flair_date_posted")
+    _create_index(connection, Post.__table__, "ix_post_user_id_date_posted")
+    # Superseded by ix_comment_post_id_date_posted_id in migration 6.
+    connection.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_comment_post_id_date_posted ON comment (post_id, date_posted)")
+    )
+
+
+@migration(4, "full-text index over post title and content")
+def _add_search_index(connection):
+    install_search_index(connection)
+
+
+@migration(5, "add post.updated_at for HTTP validators")
+def _add_post_updated_at(connection):
+    if "updated_at" not in _columns(connection, "post"):
+        connection.execute(text("ALTER TABLE post ADD COLUMN updated_at DATETIME"))
+        connection.execute(text("UPDATE post SET updated_at = date_posted"))
+    _create_index(connection, Post.__table__, "ix_post_updated_at")
+
+
+@migration(6, "index comment keyset pages on (post_id, date_posted, id)")
+def _add_comment_keyset_index(connection):
+    _create_index(connection, Comment.__table__, "ix_comment_post_id_date_posted_id")
+    connection.execute(text("DROP INDEX IF EXISTS ix_comment_post_id_date_posted"))
+
+
+@migration(7, "add the background job queue table")
+def _add_job_table(connection):
+    Job.__table__.create(connection, checkfirst=True)
+
+
+def applied_versions(connection) -> set:
+    schema_migrations.create(connection, checkfirst=True)
+    return set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+
+def run_migrations() -> List[int]:
+    """Apply every pending migration in version order; return the versions applied."""
+
+    applied = []
+    with db.engine.begin() as connection:
+        done = applied_versions(connection)
+    for step in sorted(MIGRATIONS, key=lambda m: m.version):
+        if step.version in done:
+            continue
+        with db.engine.begin() as connection:
+            if step.version in applied_versions(connection):
+                continue
+            step.apply(connection)
+            connection.execute(
+                schema_migrations.insert().values(
+                    version=step.version,
+                    description=step.description,
+                    applied_at=datetime.utcnow(),
+                )
+            )
+        applied.append(step.version)
+    return applied
+
+
+def prepare_database() -> List[int]:
+    """Create missing tables, then bring the schema up to the latest migration."""
+
+    db.create_all()
+    return run_migrations()
@@ -29,13 +29,23 @@ class Post(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     date_posted = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Bumped by every write to the row, including comment counter changes.
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     flair = db.Column(db.String(20), nullable=False, default="OTHER")
     content = db.Column(db.Text, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     comments = db.relationship(
         "Comment", backref="post", lazy=True, cascade="all, delete"
     )
 
+    __table_args__ = (
+        db.Index("ix_post_date_posted_id", "date_posted", "id"),
+        db.Index("ix_post_flair_date_posted", "flair", "date_posted"),
+        db.Index("ix_post_user_id_date_posted", "user_id", "date_posted"),
+        db.Index("ix_post_updated_at", "updated_at"),
+    )
+
     def __repr__(self):
         return f"Post('{self.title}', '{self.date_posted:%Y-%m-%d}')"
 
@@ -47,5 +57,32 @@ class Comment(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     post_id = db.Column(db.Integer, db.ForeignKey("post.id"), nullable=False)
 
+    __table_args__ = (
+        db.Index("ix_comment_post_id_date_posted_id", "post_id", "date_posted", "id"),
+    )
+
     def __repr__(self):
         return f"Comment('{self.id}', '{self.date_posted:%Y-%m-%d}')"
+
+
+class Job(db.Model):
+    """A queued background task; see ``app.services.jobs``."""
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default="{}")
+    # pending -> running -> done, or back to pending for a retry, or dead after the last attempt.
+    status = db.Column(db.String(10), nullable=False, default="pending")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    locked_by = db.Column(db.String(100))
+    last_error = db.Column(db.Text)
+
+    __table_args__ = (db.Index("ix_job_status_run_at", "status", "run_at"),)
+
+    def __repr__(self):
+        return f"Job('{self.id}', '{self.name}', '{self.status}')"
@@ -1,36 +1,92 @@
-import json
+import gzip
 from datetime import datetime
 
-from flask import abort, flash, jsonify, redirect, render_template, request, url_for
+from flask import (
+    abort,
+    flash,
+    jsonify,
+    make_response,
+    redirect,
+    render_template,
+    request,
+    stream_with_context,
+    url_for,
+)
 from flask_login import current_user, login_required, login_user, logout_user
 
 from forms import CommentForm, LoginForm, PostForm, RegistrationForm
 
-from .models import Post, User
+from .models import Comment, Post, User
 from .services.auth import authenticate_user, create_user, find_existing_user
+from .services.hashing import HashingBusy
 from .services.posts import (
+    COMMENTS_MAX_PAGE_SIZE,
+    COMMENTS_PAGE_SIZE,
     FLAIRS,
     add_comment as add_comment_service,
+    comment_page,
     comments_payload,
     create_post,
+    cursor_posts,
+    decode_cursor,
+    delete_comment as delete_comment_service,
     delete_post as delete_post_service,
-    export_posts_data,
+    export_chunks,
+    iter_export_posts,
     list_posts,
     paginate_posts,
     post_to_dict,
+    posts_version,
     stats_payload,
     update_post,
 )
+from .services.compression import gzip_stream
+from .services.conditional import conditional_json
+from .services.events import parse_cursor, poll_events
+from .services.importer import import_stream
+from .services.page_cache import cached_page
+from .services.ratelimit import rate_limited
+from .services.search import search_snippets
+
+HASHING_RETRY_AFTER = 2
+
+
+def is_post():
+    return request.method == "POST"
+
+
+def has_search_query():
+    return bool(request.args.get("q"))
+
+
+def hashing_busy(template, title, form):
+    """Re-render an auth form with 503 when the password hashing pool is saturated."""
+
+    flash("We're handling a lot of sign-ins right now. Please try again in a moment.", "danger")
+    response = make_response(render_template(template, title=title, form=form), 503)
+    response.headers["Retry-After"] = str(HASHING_RETRY_AFTER)
+    return response
 
 
 def register_routes(app):
     @app.route("/")
     @app.route("/home")
+    @cached_page
     def home():
         selected_flair = request.args.get("flair")
-        posts = list_posts(selected_flair)
+        feed = list_posts(
+            selected_flair,
+            before=request.args.get("before"),
+            after=request.args.get("after"),
+        )
         return render_template(
-            "home.html", title="Home", posts=posts, flairs=FLAIRS, selected_flair=selected_flair
+            "home.html",
+            title="Home",
+            posts=feed.items,
+            older=feed.older,
+            newer=feed.newer,
+            flairs=FLAIRS,
+            selected_flair=selected_flair,
         )
 
     @app.route("/about")
@@ -51,7 +107,10 @@ def register_routes(app):
             if exists:
                 flash("Username or email already taken.", "danger")
                 return redirect(url_for("register"))
-            user = create_user(form.username.data, form.email.data, form.password.data)
+            try:
+                user = create_user(form.username.data, form.email.data, form.password.data)
+            except HashingBusy:
+                return hashing_busy("register.html", "Register", form)
             login_user(user)
             flash(f"Welcome, {user.username}! Your account is ready.", "success")
             return redirect(url_for("home"))
@@ -63,7 +122,10 @@ def register_routes(app):
             return redirect(url_for("home"))
         form = LoginForm()
         if form.validate_on_submit():
-            user = authenticate_user(form.email.data, form.password.data)
+            try:
+                user = authenticate_user(form.email.data, form.password.data)
+            except HashingBusy:
+                return hashing_busy("login.html", "Login", form)
             if user:
                 login_user(user, remember=form.remember.data)
                 flash(f"Welcome back, {user.username}!", "success")
@@ -81,6 +143,7 @@ def register_routes(app):
 
     @app.route("/post/new", methods=["GET", "POST"])
     @login_required
+    @rate_limited("write", when=is_post)
     def new_post():
         form = PostForm()
         if form.validate_on_submit():
@@ -95,11 +158,34 @@ def register_routes(app):
         return render_template("post_create.html", title="New Post", form=form)
 
     @app.route("/post/<int:post_id>")
+    @cached_page
     def post_detail(post_id):
         post = Post.query.get_or_404(post_id)
-        return render_template("post_detail.html", title=post.title, post=post)
+        comments, next_cursor = comment_page(post)
+        return render_template(
+            "post_detail.html",
+            title=post.title,
+            post=post,
+            comments=comments,
+            next_cursor=next_cursor,
+        )
+
+    @app.get("/post/<int:post_id>/comments")
+    def post_comments_fragment(post_id):
+        """Render the next page of comments as ``<li>`` items for "load more"."""
+
+        post = Post.query.get_or_404(post_id)
+        try:
+            comments, next_cursor = comment_page(post, after=request.args.get("after"))
+        except ValueError:
+            abort(400)
+        response = make_response(render_template("_comments.html", comments=comments))
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response
 
     @app.route("/user/<string:username>")
+    @cached_page
     def user_profile(username):
         user = User.query.filter_by(username=username).first_or_404()
         posts = (
@@ -118,9 +204,10 @@ def register_routes(app):
 
     @app.route("/post/<int:post_id>/edit", methods=["GET", "POST"])
     @login_required
+    @rate_limited("write", when=is_post)
     def edit_post(post_id):
         post = Post.query.get_or_404(post_id)
-        if post.author != current_user:
+        if post.user_id != current_user.id:
             abort(403)
         form = PostForm()
         if form.validate_on_submit():
@@ -135,9 +222,10 @@ def register_routes(app):
 
     @app.route("/post/<int:post_id>/delete", methods=["POST"])
     @login_required
+    @rate_limited("write")
     def delete_post(post_id):
         post = Post.query.get_or_404(post_id)
-        if post.author != current_user:
+        if post.user_id != current_user.id:
             abort(403)
         delete_post_service(post)
         flash("Post deleted.", "success")
@@ -145,6 +233,7 @@ def register_routes(app):
 
     @app.route("/post/<int:post_id>/comment", methods=["POST"])
     @login_required
+    @rate_limited("write")
     def add_comment(post_id):
         post = Post.query.get_or_404(post_id)
         form = CommentForm()
@@ -155,14 +244,37 @@ def register_routes(app):
             flash("Could not add comment.", "danger")
         return redirect(url_for("post_detail", post_id=post.id))
 
+    @app.route("/comment/<int:comment_id>/delete", methods=["POST"])
+    @login_required
+    @rate_limited("write")
+    def delete_comment(comment_id):
+        comment = Comment.query.get_or_404(comment_id)
+        if comment.user_id != current_user.id:
+            abort(403)
+        post_id = comment.post_id
+        delete_comment_service(comment)
+        flash("Comment deleted.", "success")
+        return redirect(url_for("post_detail", post_id=post_id))
+
     @app.get("/api/health")
     def api_health():
         return jsonify({"status": "ok"}), 200
 
+    def with_snippets(items, posts, q_text):
+        if not q_text or request.args.get("snippets", "").lower() not in ("1", "true", "yes"):
+            return items
+        snippets = search_snippets(q_text, [p.id for p in posts])
+        for item in items:
+            item["snippet"] = snippets.get(item["id"])
+        return items
+
     @app.get("/api/posts")
+    @rate_limited("search", when=has_search_query)
     def api_posts():
         flair = request.args.get("flair")
         q_text = request.args.get("q", "")
+        if "cursor" in request.args or "limit" in request.args:
+            return api_posts_cursor(flair, q_text)
         try:
             page = max(int(request.args.get("page", 1)), 1)
         except ValueError:
@@ -172,46 +284,144 @@ def register_routes(app):
         except ValueError:
             per_page = 10
 
-        pagination = paginate_posts(flair, q_text, page, per_page)
-        items = [post_to_dict(p) for p in pagination.items]
-
-        return (
-            jsonify(
-                {
-                    "items": items,
-                    "page": pagination.page,
-                    "per_page": per_page,
-                    "pages": pagination.pages,
-                    "total": pagination.total,
-                    "flair": flair,
-                    "q": q_text,
-                }
-            ),
-            200,
-        )
+        def build():
+            pagination = paginate_posts(flair, q_text, page, per_page)
+            return {
+                "items": with_snippets(
+                    [post_to_dict(p) for p in pagination.items], pagination.items, q_text
+                ),
+                "page": pagination.page,
+                "per_page": per_page,
+                "pages": pagination.pages,
+                "total": pagination.total,
+                "flair": flair,
+                "q": q_text,
+            }
+
+        return conditional_json(tuple(posts_version()), None, build)
+
+    def api_posts_cursor(flair, q_text):
+        try:
+            limit = min(max(int(request.args.get("limit", 10)), 1), 50)
+        except ValueError:
+            limit = 10
+        with_total = request.args.get("with_total", "").lower() in ("1", "true", "yes")
+        cursor = request.args.get("cursor")
+        if cursor:
+            try:
+                decode_cursor(cursor)
+            except ValueError:
+                return jsonify({"error": "invalid cursor"}), 400
+
+        def build():
+            result = cursor_posts(flair, q_text, cursor, limit, with_total)
+            body = {
+                "items": with_snippets(
+                    [post_to_dict(p) for p in result["items"]], result["items"], q_text
+                ),
+                "limit": limit,
+                "next_cursor": result["next_cursor"],
+                "flair": flair,
+                "q": q_text,
+            }
+            if with_total:
+                body["total"] = result["total"]
+            return body
+
+        return conditional_json(tuple(posts_version()), None, build)
 
     @app.get("/api/posts/<int:post_id>")
     def api_post_detail(post_id):
         post = Post.query.get_or_404(post_id)
-        return jsonify(post_to_dict(post, with_content=True)), 200
+        return conditional_json(
+            post.id, post.updated_at, lambda: post_to_dict(post, with_content=True)
+        )
 
     @app.get("/api/posts/<int:post_id>/comments")
     def api_post_comments(post_id):
         post = Post.query.get_or_404(post_id)
-        return jsonify(comments_payload(post)), 200
+        try:
+            limit = int(request.args.get("limit", COMMENTS_PAGE_SIZE))
+        except ValueError:
+            limit = COMMENTS_PAGE_SIZE
+        limit = min(max(limit, 1), COMMENTS_MAX_PAGE_SIZE)
+        after = request.args.get("after")
+        if after:
+            try:
+                decode_cursor(after)
+            except ValueError:
+                return jsonify({"error": "invalid cursor"}), 400
+        return conditional_json(
+            (post.id, post.comment_count),
+            post.updated_at,
+            lambda: comments_payload(post, limit, after),
+        )
 
     @app.get("/api/stats")
     def api_stats():
-        return jsonify(stats_payload()), 200
+        return conditional_json(tuple(posts_version()), None, stats_payload)
+
+    @app.get("/api/events")
+    def api_events():
+        """Live post and comment events as Server-Sent Events."""
+
+        channels = request.args.getlist("channel") or ["feed"]
+        for channel in channels:
+            kind, _, value = channel.partition(":")
+            valid = (
+                channel == "feed"
+                or (kind == "flair" and value in dict(FLAIRS))
+                or (kind == "post" and value.isdigit())
+            )
+            if not valid:
+                return jsonify({"error": f"unknown channel {channel!r}"}), 400
+        last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+        try:
+            cursor = parse_cursor(last_event_id) if last_event_id else None
+        except ValueError:
+            return jsonify({"error": "Last-Event-ID must look like <post id>:<comment id>"}), 400
+
+        body = poll_events(channels, cursor, app.config["SSE_POLL_INTERVAL"], app.config["SSE_BATCH_SIZE"])
+        return app.response_class(body, mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    @app.post("/api/import/posts")
+    @login_required
+    @rate_limited("write")
+    def api_import_posts():
+        if current_user.username not in app.config["IMPORT_ADMINS"]:
+            return jsonify({"error": "import is restricted to IMPORT_ADMINS"}), 403
+        stream = request.stream
+        if request.headers.get("Content-Encoding", "").lower() == "gzip":
+            stream = gzip.GzipFile(fileobj=stream, mode="rb")
+        report = import_stream(stream, app.config).to_dict()
+        if report["input_error"]:
+            # Rows before the bad spot are already in; say so, so a retry can skip them.
+            return jsonify({"error": "request body could not be read to the end", **report}), 400
+        return jsonify(report)
 
     @app.get("/api/export/posts")
+    @rate_limited("export")
     def api_export_posts():
-        data = export_posts_data()
-        filename = f'posts-export-{datetime.utcnow().strftime("%Y%m%d-%H%M%SZ")}.json'
+        fmt = request.args.get("format", "json")
+        if fmt not in ("json", "ndjson"):
+            return jsonify({"error": "format must be json or ndjson"}), 400
+        since = request.args.get("since")
+        try:
+            since = datetime.fromisoformat(since) if since else None
+        except ValueError:
+            return jsonify({"error": "since must be an ISO 8601 date or datetime"}), 400
+
+        body = export_chunks(iter_export_posts(request.args.get("flair"), since), fmt)
+        headers = {}
+        if request.args.get("gzip", "").lower() in ("1", "true", "yes"):
+            body = gzip_stream(body)
+            headers["Content-Encoding"] = "gzip"
+        filename = f'posts-export-{datetime.utcnow().strftime("%Y%m%d-%H%M%SZ")}.{fmt}'
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
         return app.response_class(
-            response=json.dumps(data, ensure_ascii=False, indent=2),
-            mimetype="application/json",
-            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+            stream_with_context(body),
+            mimetype="application/x-ndjson" if fmt == "ndjson" else "application/json",
+            headers=headers,
         )
 
     @app.route("/api-demo")
@@ -0,0 +1,116 @@
+"""Production WSGI server: a pre-forking Gunicorn master with threaded workers."""
+
+import logging
+import multiprocessing
+import os
+from typing import Mapping, Optional
+
+from .extensions import db
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(env: Mapping[str, str], name: str, default: int) -> int:
+    value = env.get(name)
+    return int(value) if value else default
+
+
+def _child_exit(server, worker):  # pragma: no cover - gunicorn hook
+    from .services.monitoring import mark_worker_dead  # noqa: WPS433
+
+    mark_worker_dead(worker.pid)
+
+
+def _post_fork(server, worker):  # pragma: no cover - gunicorn hook
+    from .services.jobs import start_worker  # noqa: WPS433
+
+    app = worker.app.wsgi()
+    start_worker(app)
+
+
+def _worker_exit(server, worker):  # pragma: no cover - gunicorn hook
+    job_worker = worker.app.wsgi().extensions.get("job_worker")
+    if job_worker:
+        job_worker.stop(timeout=5)
+
+
+def server_options(env: Optional[Mapping[str, str]] = None, **overrides) -> dict:
+    """Gunicorn settings sized from the CPU count, overridable through the environment."""
+
+    env = os.environ if env is None else env
+    options = {
+        "bind": f'{env.get("FLASK_RUN_HOST", "0.0.0.0")}:{_env_int(env, "PORT", 5000)}',
+        "workers": _env_int(env, "WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1),
+        "threads": _env_int(env, "GUNICORN_THREADS", 4),
+        "worker_class": "gthread",
+        "preload_app": True,
+        "max_requests": _env_int(env, "GUNICORN_MAX_REQUESTS", 1000),
+        "max_requests_jitter": _env_int(env, "GUNICORN_MAX_REQUESTS_JITTER", 100),
+        "timeout": _env_int(env, "GUNICORN_TIMEOUT", 60),
+        "graceful_timeout": _env_int(env, "GUNICORN_GRACEFUL_TIMEOUT", 30),
+        "keepalive": _env_int(env, "GUNICORN_KEEPALIVE", 5),
+        "accesslog": env.get("GUNICORN_ACCESSLOG", "-"),
+        "child_exit": _child_exit,
+        "post_fork": _post_fork,
+        "worker_exit": _worker_exit,
+    }
+    options.update({key: value for key, value in overrides.items() if value is not None})
+    return options
+
+
+def load_app():
+    """Create the app, build assets and migrate the database once, in the master, before forking."""
+
+    from . import create_app  # noqa: WPS433
+    from .migrations import prepare_database  # noqa: WPS433
+    from .services.assets import load_manifest  # noqa: WPS433
+
+    app = create_app()
+    load_manifest(app, build=True)
+    with app.app_context():
+        prepare_database()
+        # Forked workers must not share the master's pooled connections.
+        db.engine.dispose()
+    return app
+
+
+def serve(**overrides) -> None:  # pragma: no cover - blocks running the server
+    try:
+        from gunicorn.app.base import BaseApplication  # noqa: WPS433
+    except ImportError as exc:
+        raise SystemExit(
+            "gunicorn is not installed; run 'pip install gunicorn' or use 'python -m app serve --dev'."
+        ) from exc
+
+    class ForumApplication(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return load_app()
+
+    from .services.monitoring import MULTIPROC_DIR, reset_multiprocess_dir  # noqa: WPS433
+
+    options = server_options(**overrides)
+    if MULTIPROC_DIR:
+        reset_multiprocess_dir()
+    elif options["workers"] > 1:
+        logger.warning(
+            "PROMETHEUS_MULTIPROC_DIR is not set; /metrics will only show the worker that answers."
+        )
+    ForumApplication(options).run()
+
+
+def serve_dev(host: str, port: int) -> None:  # pragma: no cover - blocks running the server
+    from .services.jobs import start_worker  # noqa: WPS433
+
+    app = load_app()
+    # The reloader runs the app in a child process; only that one processes jobs.
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_worker(app)
+    app.run(debug=True, host=host, port=port)
@@ -0,0 +1,104 @@
+"""Content-hashed static assets.
+
+``build_assets`` copies every file under ``static/`` into ``static/dist/`` as
+``name.<hash>.ext``, precompresses the copies and writes ``dist/manifest.json``.
+Templates call ``asset_url("api_demo.js")`` to get the hashed URL. Those URLs
+never change content, so they are served with a one-year immutable
+``Cache-Control``. Files missing from the manifest fall back to their plain
+``/static/`` URL.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from typing import Dict
+
+from flask import current_app, request, url_for
+
+from .compression import precompress_directory
+
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+_SKIPPED_SUFFIXES = (".gz", ".br", ".map")
+
+
+def _fingerprint(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for block in iter(lambda: source.read(65536), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def build_assets(static_folder: str, min_size: int = 0) -> Dict[str, str]:
+    """Fingerprint ``static_folder`` into ``dist/`` and return the new manifest."""
+
+    dist = os.path.join(static_folder, DIST_DIR)
+    os.makedirs(dist, exist_ok=True)
+    manifest = {}
+    for folder, dirs, files in os.walk(static_folder):
+        if os.path.abspath(folder) == os.path.abspath(static_folder):
+            dirs[:] = [d for d in dirs if d != DIST_DIR]
+        for name in sorted(files):
+            if name.endswith(_SKIPPED_SUFFIXES):
+                continue
+            source = os.path.join(folder, name)
+            logical = os.path.relpath(source, static_folder).replace(os.sep, "/")
+            stem, ext = os.path.splitext(logical)
+            hashed = f"{stem}.{_fingerprint(source)}{ext}"
+            target = os.path.join(dist, hashed)
+            if not os.path.exists(target):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copyfile(source, target)
+            manifest[logical] = f"{DIST_DIR}/{hashed}"
+
+    keep = {os.path.join(static_folder, path) for path in manifest.values()}
+    for folder, _, files in os.walk(dist):
+        for name in files:
+            path = os.path.join(folder, name)
+            base = path[:-3] if name.endswith((".gz", ".br")) else path
+            if name != MANIFEST_NAME and base not in keep:
+                os.remove(path)
+
+    precompress_directory(dist, min_size)
+    with open(os.path.join(dist, MANIFEST_NAME), "w", encoding="utf-8") as out:
+        json.dump(manifest, out, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(app, build: bool = False) -> Dict[str, str]:
+    """Load (optionally rebuilding first) the asset manifest into ``app.extensions``."""
+
+    if build or app.config["ASSETS_BUILD_ON_STARTUP"]:
+        manifest = build_assets(app.static_folder, app.config["COMPRESS_MIN_SIZE"])
+    else:
+        try:
+            with open(os.path.join(app.static_folder, DIST_DIR, MANIFEST_NAME), encoding="utf-8") as src:
+                manifest = json.load(src)
+        except FileNotFoundError:
+            manifest = {}
+    app.extensions["asset_manifest"] = manifest
+    return manifest
+
+
+def asset_url(filename: str) -> str:
+    manifest = current_app.extensions.get("asset_manifest", {})
+    return url_for("static", filename=manifest.get(filename, filename))
+
+
+def immutable_asset_headers(response):
+    if (
+        request.endpoint == "static"
+        and request.view_args.get("filename", "").startswith(f"{DIST_DIR}/")
+        and response.status_code in (200, 304)
+    ):
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def register_assets(app):
+    load_manifest(app)
+    app.add_template_global(asset_url)
+    app.after_request(immutable_asset_headers)
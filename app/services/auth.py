@@ -1,5 +1,6 @@
 from ..extensions import db
 from ..models import User
+from .hashing import PASSWORD_REHASHED, HashingBusy, get_hasher
 
 
 def find_existing_user(username: str, email: str):
@@ -7,15 +8,32 @@ def find_existing_user(username: str, email: str):
 
 
 def create_user(username: str, email: str, password: str) -> User:
-    user = User(username=username, email=email)
-    user.set_password(password)
+    """Create a user, hashing the password on the bounded pool (may raise ``HashingBusy``)."""
+
+    user = User(username=username, email=email, password_hash=get_hasher().hash(password))
     db.session.add(user)
     db.session.commit()
     return user
 
 
 def authenticate_user(email: str, password: str):
+    """Return the user for valid credentials, or None (may raise ``HashingBusy``).
+
+    A hash made with an outdated method or cost is replaced after a successful
+    check. If the pool is busy, the upgrade waits for the next login.
+    """
+
     user = User.query.filter_by(email=email).first()
-    if user and user.check_password(password):
-        return user
-    return None
+    if user is None:
+        return None
+    hasher = get_hasher()
+    if not hasher.verify(user.password_hash, password):
+        return None
+    try:
+        if hasher.needs_rehash(user.password_hash):
+            user.password_hash = hasher.hash(password)
+            db.session.commit()
+            PASSWORD_REHASHED.inc()
+    except HashingBusy:
+        pass
+    return user
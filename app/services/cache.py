@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from flask import current_app
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire ``ttl`` seconds after being set."""
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        ttl: Optional[float] = None,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                evicted_key, (_, evicted) = self._data.popitem(last=False)
+                if self.on_evict is not None:
+                    self.on_evict(evicted_key, evicted)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def pop_matching(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Drop every entry for which ``predicate(key, value)`` is true; return how many."""
+
+        with self._lock:
+            doomed = [key for key, (_, value) in self._data.items() if predicate(key, value)]
+            for key in doomed:
+                del self._data[key]
+        return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def init_caches(app) -> None:
+    """Attach the app's in-process caches to ``app.extensions``."""
+
+    from .page_cache import PAGE_CACHE_EVICTIONS  # noqa: WPS433
+
+    app.extensions["caches"] = {
+        "stats": TTLCache(maxsize=1, ttl=app.config["STATS_CACHE_TTL"]),
+        "identities": TTLCache(
+            maxsize=app.config["IDENTITY_CACHE_MAX_ENTRIES"], ttl=app.config["IDENTITY_CACHE_TTL"]
+        ),
+        "pages": TTLCache(
+            maxsize=app.config["PAGE_CACHE_MAX_ENTRIES"],
+            ttl=app.config["PAGE_CACHE_TTL"],
+            on_evict=lambda key, page: PAGE_CACHE_EVICTIONS.labels(endpoint=page.endpoint).inc(),
+        ),
+    }
+
+
+def get_cache(name: str) -> TTLCache:
+    return current_app.extensions["caches"][name]
@@ -0,0 +1,177 @@
+"""Response compression negotiated from ``Accept-Encoding``.
+
+Buffered responses above ``COMPRESS_MIN_SIZE`` are compressed with brotli
+(when the optional ``brotli`` package is installed) or gzip. Files under
+``static/`` are served from precompressed ``.br``/``.gz`` siblings written by
+``flask precompress-static``. Streamed and file responses are left alone.
+"""
+
+import gzip
+import mimetypes
+import os
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from flask import current_app, request, send_from_directory
+
+from .monitoring import Counter
+
+try:  # pragma: no cover - optional dependency
+    import brotli
+except ImportError:  # pragma: no cover - gzip only
+    brotli = None
+
+COMPRESSION_INPUT_BYTES = Counter(
+    "http_compression_input_bytes_total",
+    "Response bytes before compression",
+    ["encoding"],
+)
+COMPRESSION_OUTPUT_BYTES = Counter(
+    "http_compression_output_bytes_total",
+    "Response bytes after compression",
+    ["encoding"],
+)
+
+_STATIC_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+_PRECOMPRESS_TYPES = {"application/javascript", "text/javascript", "application/json", "image/svg+xml"}
+
+
+def gzip_stream(chunks: Iterable[Union[str, bytes]], level: int = 6) -> Iterator[bytes]:
+    """Gzip-encode a stream of chunks incrementally, never holding the whole body."""
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def available_encodings() -> List[str]:
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate_encoding() -> Optional[str]:
+    return request.accept_encodings.best_match(available_encodings())
+
+
+def _compress(data: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=min(level, 11))  # pragma: no cover - optional
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _mark_encoded(response, encoding: str, data: bytes, compressed: bytes) -> None:
+    COMPRESSION_INPUT_BYTES.labels(encoding=encoding).inc(len(data))
+    COMPRESSION_OUTPUT_BYTES.labels(encoding=encoding).inc(len(compressed))
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # The compressed body is a different representation of the same content.
+        response.set_etag(etag, weak=True)
+
+
+def compress_cached(response, variants: Dict[str, bytes]):
+    """Like ``compress_response`` for a body that is served many times.
+
+    ``variants`` maps an encoding to the compressed body and is filled on first
+    use, so later responses reuse the bytes instead of compressing again.
+    """
+
+    config = current_app.config
+    if not config["COMPRESS_ENABLED"] or response.mimetype not in config["COMPRESS_MIMETYPES"]:
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate_encoding()
+    data = response.get_data()
+    if encoding is None or len(data) < config["COMPRESS_MIN_SIZE"]:
+        return response
+    compressed = variants.get(encoding)
+    if compressed is None:
+        compressed = variants[encoding] = _compress(data, encoding, config["COMPRESS_LEVEL"])
+    _mark_encoded(response, encoding, data, compressed)
+    return response
+
+
+def compress_response(response):
+    config = current_app.config
+    if (
+        not config["COMPRESS_ENABLED"]
+        or response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in config["COMPRESS_MIMETYPES"]
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < config["COMPRESS_MIN_SIZE"]:
+        return response
+
+    _mark_encoded(response, encoding, data, _compress(data, encoding, config["COMPRESS_LEVEL"]))
+    return response
+
+
+def serve_precompressed_static():
+    """Answer ``static`` requests from a precompressed sibling file when the client accepts it."""
+
+    if request.endpoint != "static" or not current_app.config["COMPRESS_ENABLED"]:
+        return None
+    filename = request.view_args.get("filename", "")
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return None
+    candidate = filename + _STATIC_SUFFIXES[encoding]
+    if not os.path.isfile(os.path.join(current_app.static_folder, candidate)):
+        return None
+    response = send_from_directory(
+        current_app.static_folder,
+        candidate,
+        mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+        max_age=current_app.get_send_file_max_age(filename),
+    )
+    response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def precompress_directory(root: str, min_size: int = 0, level: int = 9) -> List[str]:
+    """Write ``.gz`` (and ``.br``) siblings for compressible files under ``root``.
+
+    Files whose siblings are already newer are skipped. Returns the paths written.
+    """
+
+    written = []
+    for folder, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(folder, name)
+            mimetype = mimetypes.guess_type(name)[0] or ""
+            if name.endswith((".gz", ".br")) or not (
+                mimetype.startswith("text/") or mimetype in _PRECOMPRESS_TYPES
+            ):
+                continue
+            if os.path.getsize(path) < min_size:
+                continue
+            with open(path, "rb") as source:
+                data = None
+                for encoding in available_encodings():
+                    target = path + _STATIC_SUFFIXES[encoding]
+                    if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                        continue
+                    data = source.read() if data is None else data
+                    with open(target, "wb") as out:
+                        out.write(_compress(data, encoding, level))
+                    written.append(target)
+    return written
+
+
+def register_compression(app):
+    """Install response compression and precompressed static file serving."""
+
+    app.before_request(serve_precompressed_static)
+    app.after_request(compress_response)
@@ -0,0 +1,43 @@
+"""HTTP validators (ETag / Last-Modified) for JSON endpoints.
+
+Endpoints pass a cheap version of the data they would serve. If the client
+already holds that version it gets a 304, and the payload is never loaded or
+serialized.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from flask import current_app, jsonify, request
+
+
+def _aware(moment: Optional[datetime]) -> Optional[datetime]:
+    if moment is None:
+        return None
+    return moment.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def _not_modified(etag: str, last_modified: Optional[datetime]) -> bool:
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return since is not None and last_modified is not None and last_modified <= since
+
+
+def conditional_json(version, last_modified: Optional[datetime], build: Callable[[], dict]):
+    """Return a 304 if the client is current with ``version``, else ``jsonify(build())``."""
+
+    raw = repr((request.full_path, version, last_modified)).encode()
+    etag = hashlib.sha1(raw).hexdigest()
+    last_modified = _aware(last_modified)
+
+    if _not_modified(etag, last_modified):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers["Cache-Control"] = "no-cache"
+    return response
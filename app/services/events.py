@@ -0,0 +1,129 @@
+"""Server-Sent Events for new posts and comments, read from the database.
+
+Each event goes to the channels it matches:
+
+* ``feed``: everything;
+* ``flair:<FLAIR>``: activity in that flair;
+* ``post:<id>``: new comments on that post.
+
+``/api/events`` does not hold the connection open. Each response carries the
+events after the client's ``Last-Event-ID`` and then ends, and the browser
+reconnects ``SSE_POLL_INTERVAL`` seconds later (the SSE ``retry`` field). No
+request thread waits on an idle client. Events are read from the ``post`` and
+``comment`` tables, so every worker process sees every write.
+
+An event id is ``"<post id>:<comment id>"``: the highest post and comment the
+client has been sent. A client without one starts from the current newest
+rows and receives only what is written after it connected.
+"""
+
+import json
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import contains_eager, joinedload
+
+from ..extensions import db
+from ..models import Comment, Post
+from .monitoring import Counter
+
+SSE_POLLS = Counter("sse_polls_total", "Live event requests answered")
+SSE_SENT = Counter("sse_events_sent_total", "Live events sent to clients", ["type"])
+
+
+class Cursor(NamedTuple):
+    post_id: int
+    comment_id: int
+
+    def __str__(self) -> str:
+        return f"{self.post_id}:{self.comment_id}"
+
+
+def parse_cursor(value: str) -> Cursor:
+    """Parse a ``Last-Event-ID``; raise ``ValueError`` if it is not ``"<int>:<int>"``."""
+
+    post_id, sep, comment_id = value.partition(":")
+    if not sep or not post_id.isdigit() or not comment_id.isdigit():
+        raise ValueError(value)
+    return Cursor(int(post_id), int(comment_id))
+
+
+def current_cursor() -> Cursor:
+    return Cursor(
+        db.session.scalar(select(func.max(Post.id))) or 0,
+        db.session.scalar(select(func.max(Comment.id))) or 0,
+    )
+
+
+def _split_channels(channels: List[str]) -> Tuple[bool, List[str], List[int]]:
+    feed = "feed" in channels
+    flairs = [c.partition(":")[2] for c in channels if c.startswith("flair:")]
+    posts = [int(c.partition(":")[2]) for c in channels if c.startswith("post:")]
+    return feed, flairs, posts
+
+
+def new_events(channels: List[str], after: Cursor, limit: int) -> Iterator[Tuple[str, dict, Cursor]]:
+    """Yield ``(event type, payload, cursor after it)`` for rows newer than ``after``.
+
+    At most ``limit`` posts and ``limit`` comments are returned per call. The
+    rest follow on the next poll.
+    """
+
+    feed, flairs, post_ids = _split_channels(channels)
+    cursor = after
+
+    if feed or flairs:
+        query = select(Post).options(joinedload(Post.author)).where(Post.id > after.post_id)
+        if not feed:
+            query = query.where(Post.flair.in_(flairs))
+        posts = db.session.scalars(query.order_by(Post.id).limit(limit)).all()
+        for post in posts:
+            cursor = cursor._replace(post_id=post.id)
+            yield "post_created", {
+                "id": post.id,
+                "title": post.title,
+                "flair": post.flair,
+                "author": post.author.username,
+                "date_posted": post.date_posted.isoformat(),
+            }, cursor
+
+    query = (
+        select(Comment)
+        .join(Comment.post)
+        .options(joinedload(Comment.author), contains_eager(Comment.post))
+        .where(Comment.id > after.comment_id)
+    )
+    if not feed:
+        query = query.where(or_(Post.flair.in_(flairs), Comment.post_id.in_(post_ids)))
+    comments = db.session.scalars(query.order_by(Comment.id).limit(limit)).all()
+    for comment in comments:
+        cursor = cursor._replace(comment_id=comment.id)
+        yield "comment_added", {
+            "id": comment.id,
+            "post_id": comment.post_id,
+            "author": comment.author.username,
+            "content": comment.content,
+            "date_posted": comment.date_posted.isoformat(),
+            "comment_count": comment.post.comment_count,
+        }, cursor
+
+
+def format_event(event_id: Cursor, event_type: Optional[str] = None, payload: Optional[dict] = None) -> str:
+    if event_type is None:
+        # An id-only block moves the browser's Last-Event-ID without dispatching anything.
+        return f"id: {event_id}\n\n"
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(payload)}\n\n"
+
+
+def poll_events(channels: List[str], last_event_id: Optional[Cursor], poll_interval: float, limit: int) -> str:
+    """Render one short SSE response: the retry interval, then any new events."""
+
+    SSE_POLLS.inc()
+    frames = [f"retry: {int(poll_interval * 1000)}\n\n"]
+    if last_event_id is None:
+        frames.append(format_event(current_cursor()))
+        return "".join(frames)
+    for event_type, payload, cursor in new_events(channels, last_event_id, limit):
+        SSE_SENT.labels(type=event_type).inc()
+        frames.append(format_event(cursor, event_type, payload))
+    return "".join(frames)
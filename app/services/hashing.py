@@ -0,0 +1,112 @@
+"""Password hashing on a dedicated, bounded worker pool.
+
+The KDF is deliberately slow, so running it inline lets a burst of sign-ins
+occupy every request thread. ``PasswordHasher`` runs hashing on its own small
+thread pool (``hashlib``'s KDFs release the GIL while they work). It admits at
+most ``PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE`` jobs at once and raises
+``HashingBusy`` straight away for anything beyond that, so page views never
+queue behind password checks.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Callable
+
+from flask import current_app
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+from .monitoring import Counter, Histogram
+
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds", "Time spent hashing or verifying passwords", ["operation"]
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "Password hashing jobs refused or timed out because the pool was saturated",
+)
+PASSWORD_REHASHED = Counter(
+    "password_rehash_total", "Stored password hashes upgraded to the configured method on login"
+)
+
+
+class HashingBusy(RuntimeError):
+    """Raised when the hashing pool and its queue are full, or a job outlives the timeout."""
+
+
+def method_prefix(method: str) -> str:
+    """The method prefix Werkzeug writes for ``method``, with its default parameters filled in."""
+
+    name, *args = method.split(":")
+    if name == "scrypt" and not args:
+        args = ["32768", "8", "1"]
+    elif name == "pbkdf2":
+        if not args:
+            args = ["sha256"]
+        if len(args) == 1:
+            args.append(str(DEFAULT_PBKDF2_ITERATIONS))
+    return ":".join([name, *args])
+
+
+class PasswordHasher:
+    def __init__(self, method: str, max_workers: int, max_queue: int, timeout: float):
+        self.method = method
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pwhash")
+        self._prefix = method_prefix(method)
+
+    def run(self, operation: str, fn: Callable, *args):
+        """Run ``fn(*args)`` on the pool and wait for it; raise ``HashingBusy`` if saturated."""
+
+        if not self._slots.acquire(blocking=False):
+            PASSWORD_HASH_REJECTED.inc()
+            raise HashingBusy(operation)
+        try:
+            future = self._executor.submit(self._timed, operation, fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # The job keeps its slot until it finishes, so a stuck pool still sheds load.
+            PASSWORD_HASH_REJECTED.inc()
+            raise HashingBusy(operation) from None
+
+    @staticmethod
+    def _timed(operation: str, fn: Callable, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            PASSWORD_HASH_SECONDS.labels(operation=operation).observe(time.perf_counter() - start)
+
+    def hash(self, password: str) -> str:
+        return self.run("hash", generate_password_hash, password, self.method)
+
+    def verify(self, pwhash: str, password: str) -> bool:
+        return self.run("verify", check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        """True when ``pwhash`` was made with a different method or cost than configured."""
+
+        return pwhash.split("$", 1)[0] != self._prefix
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+def init_password_hasher(app) -> None:
+    app.extensions["password_hasher"] = PasswordHasher(
+        method=app.config["PASSWORD_HASH_METHOD"],
+        max_workers=app.config["PASSWORD_HASH_WORKERS"],
+        max_queue=app.config["PASSWORD_HASH_QUEUE"],
+        timeout=app.config["PASSWORD_HASH_TIMEOUT"],
+    )
+
+
+def get_hasher() -> PasswordHasher:
+    return current_app.extensions["password_hasher"]
@@ -0,0 +1,77 @@
+"""Cached identities for the Flask-Login ``user_loader``.
+
+Every authenticated request resolves ``current_user`` from the session. Rather
+than loading the full ``User`` row each time, ``load_identity`` returns a small
+``Identity`` holding only the fields templates and ownership checks use (id and
+username). It is memoised for the request in ``g`` and kept in the
+``identities`` TTL cache across requests. Updating or deleting a ``User`` drops
+its entry. ``IDENTITY_CACHE_TTL`` bounds staleness for writes handled by other
+worker processes.
+"""
+
+from typing import Optional
+
+from flask import g, has_app_context
+from flask_login import UserMixin
+from sqlalchemy import event, select
+
+from ..extensions import db
+from ..models import User
+from .cache import get_cache
+from .monitoring import Counter
+
+IDENTITY_CACHE_HITS = Counter("identity_cache_hits_total", "Logged-in user lookups served from cache")
+IDENTITY_CACHE_MISSES = Counter(
+    "identity_cache_misses_total", "Logged-in user lookups that queried the database"
+)
+
+
+class Identity(UserMixin):
+    """The logged-in user as seen by views: id and username, no ORM state."""
+
+    def __init__(self, id: int, username: str):
+        self.id = id
+        self.username = username
+
+    def __repr__(self):
+        return f"Identity({self.id!r}, {self.username!r})"
+
+
+def load_identity(user_id: str) -> Optional[Identity]:
+    try:
+        uid = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    memo = g.setdefault("identities", {})
+    if uid in memo:
+        return memo[uid]
+
+    cache = get_cache("identities")
+    identity = cache.get(uid)
+    if identity is not None:
+        IDENTITY_CACHE_HITS.inc()
+    else:
+        IDENTITY_CACHE_MISSES.inc()
+        row = db.session.execute(select(User.id, User.username).where(User.id == uid)).first()
+        if row is None:
+            return None
+        identity = Identity(row.id, row.username)
+        cache.set(uid, identity)
+    memo[uid] = identity
+    return identity
+
+
+def forget_identity(user_id: int) -> None:
+    """Drop ``user_id`` from the identity cache of the current app, if any."""
+
+    if not has_app_context():
+        return
+    get_cache("identities").pop(user_id)
+    g.get("identities", {}).pop(user_id, None)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    forget_identity(target.id)
@@ -0,0 +1,266 @@
+"""Bulk import of posts (with nested comments) from NDJSON.
+
+Each input line is one post::
+
+    {"title": "...", "content": "...", "author": "alice", "flair": "TRADE_HELP",
+     "date_posted": "2023-09-01T12:00:00",
+     "comments": [{"author": "bob", "content": "...", "date_posted": "..."}]}
+
+``flair`` (default ``OTHER``), ``date_posted`` (default now) and ``comments``
+are optional. Input is read one line at a time, and rows are written in
+batches of ``batch_size`` posts plus comments per transaction. Author
+usernames are resolved through a bounded cache. A bad line is reported with
+its line number and skipped; the rest of the batch still goes in. Input that
+cannot be read to the end (a corrupt or truncated gzip body) stops the import
+there. The report then carries ``input_error``, and the batches committed
+before that point are still counted. An import that added posts queues
+``optimize_search_index`` to compact the full-text index in the background.
+"""
+
+import json
+from collections import OrderedDict
+from datetime import datetime
+from typing import IO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..extensions import db
+from ..models import Comment, Post, User
+from .cache import get_cache
+from .posts import FLAIRS, invalidate_stats
+from .search import schedule_search_optimize
+
+FLAIR_CODES = {code for code, _ in FLAIRS}
+TITLE_MAX_LENGTH = Post.__table__.c.title.type.length
+
+
+class RecordError(ValueError):
+    """A record that cannot be imported; the message is reported back to the caller."""
+
+
+class PostRecord(NamedTuple):
+    line: int
+    post: dict
+    comments: List[dict]
+
+
+class ImportReport:
+    def __init__(self, max_errors: int = 100):
+        self.posts = 0
+        self.comments = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+        self.max_errors = max_errors
+        self.input_error: Optional[str] = None
+
+    def error(self, line: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": message})
+
+    def to_dict(self) -> dict:
+        return {
+            "posts": self.posts,
+            "comments": self.comments,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "input_error": self.input_error,
+        }
+
+
+def iter_lines(stream: IO[bytes], max_bytes: int) -> Iterator[Tuple[int, Optional[bytes]]]:
+    """Yield ``(line number, line)`` from a binary stream; ``None`` marks a line over ``max_bytes``."""
+
+    number = 0
+    while True:
+        line = stream.readline(max_bytes + 1)
+        if not line:
+            return
+        number += 1
+        if len(line) > max_bytes and not line.endswith(b"\n"):
+            # Too long: skip the rest of it without holding it in memory.
+            while line and not line.endswith(b"\n"):
+                line = stream.readline(max_bytes)
+            yield number, None
+            continue
+        yield number, line
+
+
+class AuthorCache:
+    """Username to user id, looked up on demand and kept in a bounded LRU."""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._ids: "OrderedDict[str, Optional[int]]" = OrderedDict()
+
+    def resolve(self, username) -> int:
+        if not isinstance(username, str) or not username:
+            raise RecordError("author must be a username")
+        if username in self._ids:
+            self._ids.move_to_end(username)
+            user_id = self._ids[username]
+        else:
+            user_id = db.session.scalar(select(User.id).where(User.username == username))
+            self._ids[username] = user_id
+            if len(self._ids) > self.maxsize:
+                self._ids.popitem(last=False)
+        if user_id is None:
+            raise RecordError(f"unknown author {username!r}")
+        return user_id
+
+
+def _date(value, field: str, default: datetime) -> datetime:
+    if value is None:
+        return default
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise RecordError(f"{field} must be an ISO 8601 datetime") from None
+
+
+def _text(record: dict, field: str, max_length: Optional[int] = None) -> str:
+    value = record.get(field)
+    if not isinstance(value, str) or not value.strip():
+        raise RecordError(f"{field} is required")
+    if max_length and len(value) > max_length:
+        raise RecordError(f"{field} is longer than {max_length} characters")
+    return value
+
+
+def parse_record(line: int, raw: bytes, authors: AuthorCache, now: datetime) -> PostRecord:
+    try:
+        record = json.loads(raw)
+    except ValueError:
+        raise RecordError("invalid JSON") from None
+    if not isinstance(record, dict):
+        raise RecordError("each line must be a JSON object")
+
+    flair = record.get("flair", "OTHER")
+    if flair not in FLAIR_CODES:
+        raise RecordError(f"unknown flair {flair!r}")
+    posted = _date(record.get("date_posted"), "date_posted", now)
+    comments_in = record.get("comments") or []
+    if not isinstance(comments_in, list):
+        raise RecordError("comments must be a list")
+
+    comments = []
+    for index, comment in enumerate(comments_in):
+        if not isinstance(comment, dict):
+            raise RecordError(f"comments[{index}] must be an object")
+        try:
+            comments.append({
+                "content": _text(comment, "content"),
+                "user_id": authors.resolve(comment.get("author")),
+                "date_posted": _date(comment.get("date_posted"), "date_posted", posted),
+            })
+        except RecordError as exc:
+            raise RecordError(f"comments[{index}]: {exc}") from None
+
+    post = {
+        "title": _text(record, "title", TITLE_MAX_LENGTH),
+        "content": _text(record, "content"),
+        "flair": flair,
+        "user_id": authors.resolve(record.get("author")),
+        "date_posted": posted,
+        "updated_at": now,
+        "comment_count": len(comments),
+    }
+    return PostRecord(line, post, comments)
+
+
+def _insert(records: List[PostRecord]) -> None:
+    post_ids = db.session.scalars(
+        insert(Post).returning(Post.id, sort_by_parameter_order=True),
+        [record.post for record in records],
+    ).all()
+    comments = [
+        {**comment, "post_id": post_id}
+        for record, post_id in zip(records, post_ids)
+        for comment in record.comments
+    ]
+    if comments:
+        db.session.execute(insert(Comment), comments)
+
+
+def _flush(records: List[PostRecord], report: ImportReport) -> None:
+    """Write one batch in a single transaction, falling back to per-record writes on error."""
+
+    if not records:
+        return
+    try:
+        _insert(records)
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        for record in records:
+            try:
+                _insert([record])
+                db.session.commit()
+            except SQLAlchemyError as exc:
+                db.session.rollback()
+                report.error(record.line, f"database error: {exc.__class__.__name__}")
+                continue
+            report.posts += 1
+            report.comments += len(record.comments)
+        return
+    report.posts += len(records)
+    report.comments += sum(len(record.comments) for record in records)
+
+
+def import_posts(
+    lines: Iterable[Tuple[int, Optional[bytes]]],
+    batch_size: int = 1000,
+    max_errors: int = 100,
+) -> ImportReport:
+    """Import ``(line number, raw line)`` pairs, as produced by ``iter_lines``."""
+
+    report = ImportReport(max_errors)
+    authors = AuthorCache()
+    now = datetime.utcnow()
+    batch: List[PostRecord] = []
+    rows = 0
+    line = 0
+    lines = iter(lines)
+    while True:
+        try:
+            line, raw = next(lines)
+        except StopIteration:
+            break
+        except (OSError, EOFError) as exc:
+            # Earlier batches are committed; report how far the input got.
+            report.input_error = f"input unreadable after line {line}: {exc}"
+            report.error(line + 1, "input ended unexpectedly")
+            break
+        if raw is None:
+            report.error(line, "line too long")
+            continue
+        if not raw.strip():
+            continue
+        try:
+            record = parse_record(line, raw, authors, now)
+        except RecordError as exc:
+            report.error(line, str(exc))
+            continue
+        batch.append(record)
+        rows += 1 + len(record.comments)
+        if rows >= batch_size:
+            _flush(batch, report)
+            batch, rows = [], 0
+    _flush(batch, report)
+
+    if report.posts:
+        schedule_search_optimize()
+        db.session.commit()
+        invalidate_stats()
+        get_cache("pages").clear()
+    return report
+
+
+def import_stream(stream: IO[bytes], config: Dict) -> ImportReport:
+    return import_posts(
+        iter_lines(stream, config["IMPORT_MAX_LINE_BYTES"]),
+        batch_size=config["IMPORT_BATCH_SIZE"],
+        max_errors=config["IMPORT_MAX_ERRORS"],
+    )
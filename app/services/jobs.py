@@ -0,0 +1,287 @@
+"""Durable background jobs for write side effects.
+
+A write service calls ``enqueue(name, payload)`` before it commits, so the
+job row goes into the ``job`` table in the same transaction as the post or
+comment: it exists if and only if the write does. The request returns as soon
+as that commit is done.
+
+A job may run in any process, including a separate ``flask run-jobs``, so jobs
+are for durable work against shared state (the database, external services).
+Process-local effects, such as the page caches, stay in the request right
+after the commit. ``optimize_search_index`` (``app.services.search``), queued
+after a bulk import, is the first user.
+
+``JobWorker`` polls the table from a dispatcher thread, claims due jobs with a
+conditional ``UPDATE`` (safe with several worker processes) and runs them on
+a ``JOBS_WORKER_THREADS`` pool. An idle poll only reads, so it never takes the
+SQLite write lock. A job that raises is retried with exponential
+backoff. After ``max_attempts`` it is marked ``dead`` and kept with its last
+error for inspection. A job left ``running`` by a crashed process counts as a
+failed attempt once ``JOBS_LEASE_SECONDS`` pass, and is retried or marked dead
+like any other failure.
+
+Handlers are registered with ``@job("name")`` and called as ``handler(**payload)``
+inside an app context. They may run more than once, so they must be safe to
+repeat.
+
+``python -m app serve`` and ``python app.py`` start a worker in every server
+process; ``flask run-jobs`` runs one on its own.
+"""
+
+import json
+import logging
+import os
+import random
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy import delete, func, select, update
+
+from ..extensions import db
+from ..models import Job
+from .monitoring import Counter, Gauge, Histogram
+
+JOB_HANDLERS: Dict[str, Callable] = {}
+
+JOBS_QUEUE_DEPTH = Gauge(
+    "jobs_queue_depth", "Background jobs by status", ["status"], multiprocess_mode="livemax"
+)
+JOBS_LATENCY = Histogram(
+    "jobs_latency_seconds", "Time a due job waited before it started", ["name"]
+)
+JOBS_DURATION = Histogram("jobs_duration_seconds", "Time spent running a job", ["name"])
+JOBS_PROCESSED = Counter(
+    "jobs_processed_total", "Background job attempts by outcome", ["name", "outcome"]
+)
+
+logger = logging.getLogger(__name__)
+
+
+def job(name: str):
+    def register(fn):
+        JOB_HANDLERS[name] = fn
+        return fn
+
+    return register
+
+
+def enqueue(name: str, payload: dict, delay: float = 0, max_attempts: Optional[int] = None) -> Job:
+    """Add a job to the current session; it is saved by the caller's commit."""
+
+    if name not in JOB_HANDLERS:
+        raise KeyError(f"no job handler registered for {name!r}")
+    now = datetime.utcnow()
+    row = Job(
+        name=name,
+        payload=json.dumps(payload),
+        run_at=now + timedelta(seconds=delay),
+        created_at=now,
+        max_attempts=max_attempts or current_app.config["JOBS_MAX_ATTEMPTS"],
+    )
+    db.session.add(row)
+    return row
+
+
+def backoff_seconds(attempts: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter: up to ``base * 2**(attempts - 1)``, capped."""
+
+    return random.uniform(0, min(cap, base * 2 ** (attempts - 1)))
+
+
+def claim_jobs(worker_id: str, limit: int, lease: float, now: Optional[datetime] = None) -> List[int]:
+    """Mark up to ``limit`` due jobs as running for ``worker_id``; return their ids."""
+
+    now = now or datetime.utcnow()
+    _reclaim_expired(lease, now)
+    candidates = db.session.scalars(
+        select(Job.id)
+        .where(Job.status == "pending", Job.run_at <= now)
+        .order_by(Job.run_at, Job.id)
+        .limit(limit)
+    ).all()
+    claimed = []
+    for job_id in candidates:
+        result = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "pending")
+            .values(status="running", locked_by=worker_id, started_at=now)
+        )
+        if result.rowcount:
+            claimed.append(job_id)
+    db.session.commit()
+    return claimed
+
+
+def _reclaim_expired(lease: float, now: datetime) -> None:
+    """Count a run whose worker died (lease expired) as a failed attempt.
+
+    A handler that crashes its process never reaches ``run_job``'s error
+    handling, so without this it would be retried forever.
+    """
+
+    cutoff = now - timedelta(seconds=lease)
+    # A read-only check first: idle pollers must not take the SQLite write lock.
+    expired_ids = db.session.scalars(
+        select(Job.id).where(Job.status == "running", Job.started_at < cutoff)
+    ).all()
+    if not expired_ids:
+        return
+    expired = (Job.id.in_(expired_ids), Job.status == "running", Job.started_at < cutoff)
+    failed = {
+        "attempts": Job.attempts + 1,
+        "locked_by": None,
+        "last_error": f"lease expired after {lease:g}s; the worker running it died",
+    }
+    dead = db.session.execute(
+        update(Job)
+        .where(*expired, Job.attempts + 1 >= Job.max_attempts)
+        .values(status="dead", finished_at=now, **failed)
+    )
+    retried = db.session.execute(update(Job).where(*expired).values(status="pending", **failed))
+    if dead.rowcount or retried.rowcount:
+        logger.warning("reclaimed expired jobs: %d retried, %d dead", retried.rowcount, dead.rowcount)
+
+
+def run_job(job_id: int, now: Optional[datetime] = None) -> str:
+    """Run one claimed job and record the outcome: ``done``, ``retry`` or ``dead``."""
+
+    row = db.session.get(Job, job_id)
+    name, started = row.name, now or datetime.utcnow()
+    JOBS_LATENCY.labels(name=name).observe(max((started - row.run_at).total_seconds(), 0))
+    try:
+        JOB_HANDLERS[name](**json.loads(row.payload))
+    except Exception as exc:  # noqa: B902 - any handler failure is retried
+        db.session.rollback()
+        outcome = _record_failure(db.session.get(Job, job_id), exc, started)
+    else:
+        row.attempts += 1
+        row.status, row.locked_by, row.finished_at = "done", None, datetime.utcnow()
+        outcome = "done"
+    db.session.commit()
+    JOBS_DURATION.labels(name=name).observe(max((datetime.utcnow() - started).total_seconds(), 0))
+    JOBS_PROCESSED.labels(name=name, outcome=outcome).inc()
+    return outcome
+
+
+def _record_failure(row: Job, exc: Exception, now: datetime) -> str:
+    row.attempts += 1
+    row.locked_by = None
+    row.last_error = f"{exc.__class__.__name__}: {exc}"[:2000]
+    if row.attempts >= row.max_attempts:
+        row.status, row.finished_at = "dead", now
+        logger.error("job %s (%s) is dead after %d attempts: %s", row.id, row.name, row.attempts, exc)
+        return "dead"
+    config = current_app.config
+    delay = backoff_seconds(row.attempts, config["JOBS_BACKOFF_BASE"], config["JOBS_BACKOFF_MAX"])
+    row.status, row.run_at = "pending", now + timedelta(seconds=delay)
+    logger.warning("job %s (%s) failed, retrying in %.1fs: %s", row.id, row.name, delay, exc)
+    return "retry"
+
+
+def run_pending(limit: int = 100, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Claim and run due jobs in the calling thread; return a count per outcome."""
+
+    outcomes: Dict[str, int] = {}
+    lease = current_app.config["JOBS_LEASE_SECONDS"]
+    for job_id in claim_jobs(f"inline-{os.getpid()}", limit, lease, now):
+        outcome = run_job(job_id, now)
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    return outcomes
+
+
+def refresh_queue_depth() -> Dict[str, int]:
+    query = select(Job.status, func.count(Job.id)).group_by(Job.status)
+    counts = dict(db.session.execute(query).all())
+    for status in ("pending", "running", "dead"):
+        JOBS_QUEUE_DEPTH.labels(status=status).set(counts.get(status, 0))
+    return counts
+
+
+def purge_finished(older_than: float) -> int:
+    cutoff = datetime.utcnow() - timedelta(seconds=older_than)
+    finished = (Job.status == "done", Job.finished_at < cutoff)
+    if db.session.scalar(select(Job.id).where(*finished).limit(1)) is None:
+        return 0
+    result = db.session.execute(delete(Job).where(*finished))
+    db.session.commit()
+    return result.rowcount
+
+
+class JobWorker:
+    """Poll for due jobs and run them on a thread pool until ``stop()``."""
+
+    DEPTH_EVERY = 10  # refresh the queue-depth gauge every N polls
+
+    def __init__(self, app, threads: int, poll_interval: float):
+        self.app = app
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="job")
+        self._busy = threading.Semaphore(threads)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._poll, name="job-dispatcher", daemon=True)
+
+    def start(self) -> "JobWorker":
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stopped.set()
+        self._thread.join(timeout)
+        self._pool.shutdown(wait=True)
+
+    def _poll(self) -> None:
+        polls = 0
+        while not self._stopped.is_set():
+            try:
+                with self.app.app_context():
+                    if polls % self.DEPTH_EVERY == 0:
+                        refresh_queue_depth()
+                        purge_finished(self.app.config["JOBS_RETENTION_SECONDS"])
+                    polls += 1
+                    free = self._free_slots()
+                    lease = self.app.config["JOBS_LEASE_SECONDS"]
+                    claimed = claim_jobs(self.worker_id, free, lease) if free else []
+            except Exception:  # noqa: B902 - keep polling through transient DB errors
+                logger.exception("job poll failed")
+                claimed = []
+            for job_id in claimed:
+                self._busy.acquire()
+                self._pool.submit(self._run, job_id)
+            if not claimed:
+                self._stopped.wait(self.poll_interval)
+
+    def _free_slots(self) -> int:
+        free = 0
+        while self._busy.acquire(blocking=False):
+            free += 1
+        for _ in range(free):
+            self._busy.release()
+        return free
+
+    def _run(self, job_id: int) -> None:
+        try:
+            with self.app.app_context():
+                run_job(job_id)
+        except Exception:  # noqa: B902
+            logger.exception("job %s crashed the runner", job_id)
+        finally:
+            self._busy.release()
+
+
+def start_worker(app) -> Optional[JobWorker]:
+    """Start a ``JobWorker`` for ``app`` unless ``JOBS_WORKER_ENABLED`` is off.
+
+    No worker is started while no handler is registered: it would only poll.
+    """
+
+    if not app.config["JOBS_WORKER_ENABLED"] or not JOB_HANDLERS:
+        return None
+    worker = JobWorker(app, app.config["JOBS_WORKER_THREADS"], app.config["JOBS_POLL_INTERVAL"]).start()
+    app.extensions["job_worker"] = worker
+    return worker
@@ -1,19 +1,39 @@
 
 
+import logging
+import os
+import queue
+import threading
 import time
 from typing import List, Optional
 
 from flask import Response, request
 
+# With several worker processes, prometheus_client keeps metric values in
+# mmap'd files under PROMETHEUS_MULTIPROC_DIR and /metrics merges them. The
+# variable must be set in the environment before this module is first imported.
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+if MULTIPROC_DIR:
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
 try:  # pragma: no cover - dependency provided in production
-    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Gauge,
+        Histogram,
+        generate_latest,
+        multiprocess,
+    )
 except ImportError:  # pragma: no cover - lightweight fallback for offline environments
     CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+    MULTIPROC_DIR = None
 
     _FALLBACK_METRICS: List["_BaseMetric"] = []
 
     class _BaseMetric:
-        def __init__(self, name, documentation, labelnames):
+        def __init__(self, name, documentation, labelnames=(), **kwargs):
             self._name = name
             self._documentation = documentation
             self._labelnames = labelnames
@@ -28,13 +48,22 @@ except ImportError:  # pragma: no cover - lightweight fallback for offline envir
         def inc(self, amount=1):
             return self
 
+    class Gauge(_BaseMetric):
+        _type = "gauge"
+
+        def inc(self, amount=1):
+            return self
+
+        def dec(self, amount=1):
+            return self
+
     class Histogram(_BaseMetric):
         _type = "histogram"
 
         def observe(self, amount):
             return self
 
-    def generate_latest():
+    def generate_latest(registry=None):
         lines = []
         for metric in _FALLBACK_METRICS:
             lines.append(f"# HELP {metric._name} {metric._documentation}")
@@ -53,17 +82,79 @@ REQUEST_LATENCY = Histogram(
     "HTTP request latency in seconds",
     ["endpoint"],
 )
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "HTTP response body size in bytes as sent (after compression); streamed bodies are not counted",
+    ["endpoint"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled, summed over live worker processes",
+    multiprocess_mode="livesum",
+)
 ERROR_COUNTER = Counter(
     "http_request_errors_total",
     "HTTP requests resulting in errors (status >= 500)",
     ["endpoint"],
 )
+TRACE_SPANS_QUEUED = Counter(
+    "tracing_spans_queued_total",
+    "Trace spans accepted into the export queue",
+    [],
+)
+TRACE_SPANS_DROPPED = Counter(
+    "tracing_spans_dropped_total",
+    "Trace spans dropped because the export queue was full",
+    [],
+)
+TRACE_SPANS_EXPORTED = Counter(
+    "tracing_spans_exported_total",
+    "Trace spans handed to the exporter, by outcome",
+    ["outcome"],
+)
+
+logger = logging.getLogger(__name__)
+
+
+UNMATCHED_ENDPOINT = "unmatched"
+
+
+def endpoint_label() -> str:
+    """Return the matched endpoint name, or one fixed label for unrouted paths.
+
+    Labelling by raw path would turn every 404 probe into a new time series.
+    """
+
+    return request.endpoint or UNMATCHED_ENDPOINT
+
 
+def collect_metrics() -> bytes:
+    """Render all metrics, merged across worker processes in multiprocess mode."""
 
-def _get_endpoint_label() -> str:
-    """Return a stable endpoint label for metrics."""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
 
-    return request.endpoint or request.path or "unknown"
+
+def reset_multiprocess_dir() -> None:
+    """Delete metric files left by earlier runs (called in the server master before forking)."""
+
+    if not MULTIPROC_DIR:
+        return
+    own_suffix = f"_{os.getpid()}.db"
+    for name in os.listdir(MULTIPROC_DIR):
+        if name.endswith(".db") and not name.endswith(own_suffix):
+            os.remove(os.path.join(MULTIPROC_DIR, name))
+
+
+def mark_worker_dead(pid: int) -> None:
+    """Drop a dead worker's live gauges (gunicorn ``child_exit`` hook)."""
+
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
 
 
 def register_monitoring(app):
@@ -72,6 +163,13 @@ def register_monitoring(app):
     @app.before_request
     def start_timer():  # noqa: WPS430
         request._start_time = time.perf_counter()  # noqa: WPS437
+        request._in_flight = True  # noqa: WPS437
+        REQUESTS_IN_FLIGHT.inc()
+
+    @app.teardown_request
+    def finish_request(exc):  # noqa: WPS430
+        if getattr(request, "_in_flight", False):
+            REQUESTS_IN_FLIGHT.dec()
 
     @app.after_request
     def record_metrics(response):  # noqa: WPS430
@@ -81,39 +179,135 @@ def register_monitoring(app):
         else:
             latency = 0
 
-        endpoint_label = _get_endpoint_label()
+        endpoint = endpoint_label()
         REQUEST_COUNTER.labels(
             method=request.method,
-            endpoint=endpoint_label,
+            endpoint=endpoint,
             status=response.status_code,
         ).inc()
-        REQUEST_LATENCY.labels(endpoint=endpoint_label).observe(latency)
+        REQUEST_LATENCY.labels(endpoint=endpoint).observe(latency)
+        if not response.is_streamed:
+            RESPONSE_SIZE.labels(endpoint=endpoint).observe(response.calculate_content_length() or 0)
         if response.status_code >= 500:
-            ERROR_COUNTER.labels(endpoint=endpoint_label).inc()
+            ERROR_COUNTER.labels(endpoint=endpoint).inc()
 
         return response
 
     @app.route("/metrics")
     def metrics():  # noqa: WPS430
-        return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+        return Response(collect_metrics(), mimetype=CONTENT_TYPE_LATEST)
+
+
+class BatchingSpanExporter:
+    """Queue spans in memory and export them in batches from a background thread.
+
+    ``export`` never blocks the request: when the bounded queue is full the span
+    is dropped and counted instead.
+
+    The thread is started by the first ``export`` in each process. The app is
+    created in the Gunicorn master before workers fork, and a thread started
+    there would not exist in the workers.
+    """
+
+    def __init__(self, exporter, max_queue_size=2048, batch_size=100, interval=5.0):
+        self._exporter = exporter
+        self._max_queue_size = max_queue_size
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue_size)
+        self._batch_size = batch_size
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    def _ensure_thread(self) -> None:
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Forked: the parent's queued spans are its own to export.
+                self._queue = queue.Queue(maxsize=self._max_queue_size)
+            self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def export(self, span_datas):
+        self._ensure_thread()
+        for span_data in span_datas:
+            try:
+                self._queue.put_nowait(span_data)
+            except queue.Full:
+                TRACE_SPANS_DROPPED.inc()
+            else:
+                TRACE_SPANS_QUEUED.inc()
+
+    emit = export
+
+    def _next_batch(self, timeout: Optional[float]) -> list:
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=timeout))
+            while len(batch) < self._batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _send(self, batch) -> None:
+        try:
+            self._exporter.emit(batch)
+        except Exception:  # noqa: B902 - an exporter failure must never kill the thread
+            logger.warning("Dropping %d spans after export failure", len(batch), exc_info=True)
+            TRACE_SPANS_EXPORTED.labels(outcome="failed").inc(len(batch))
+        else:
+            TRACE_SPANS_EXPORTED.labels(outcome="ok").inc(len(batch))
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            batch = self._next_batch(self._interval)
+            if batch:
+                self._send(batch)
+
+    def flush(self) -> None:
+        """Export everything queued so far from the calling thread."""
+
+        while True:
+            batch = self._next_batch(timeout=0)
+            if not batch:
+                return
+            self._send(batch)
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        self.flush()
 
 
 def configure_application_insights(app):
-    """Configure Azure Application Insights if connection string is provided."""
+    """Trace requests to Azure Application Insights when a connection string is configured.
+
+    Returns the span exporter, or ``None`` when tracing is off. The opencensus
+    packages are only imported when tracing is on.
+    """
 
-    connection_string = (
-        "InstrumentationKey=8b8eb364-0945-443f-accc-40fb6ab3cac6;"
-        "IngestionEndpoint=https://westeurope-5.in.applicationinsights.azure.com/;"
-        "LiveEndpoint=https://westeurope.livediagnostics.monitor.azure.com/;"
-        "ApplicationId=3e5a6c3c-4402-45cd-a880-6bb81161ae89"
+    connection_string = app.config.get("APPLICATIONINSIGHTS_CONNECTION_STRING") or os.environ.get(
+        "APPLICATIONINSIGHTS_CONNECTION_STRING"
     )
+    sample_rate = float(app.config.get("TRACING_SAMPLE_RATE", 0))
+    if not connection_string or sample_rate <= 0 or app.testing:
+        return None
 
     from opencensus.ext.azure.trace_exporter import AzureExporter
     from opencensus.ext.flask.flask_middleware import FlaskMiddleware
     from opencensus.trace.samplers import ProbabilitySampler
 
-    FlaskMiddleware(
-        app,
-        exporter=AzureExporter(connection_string=connection_string),
-        sampler=ProbabilitySampler(1.0),
+    exporter = BatchingSpanExporter(
+        AzureExporter(connection_string=connection_string),
+        max_queue_size=app.config["TRACING_QUEUE_SIZE"],
+        batch_size=app.config["TRACING_BATCH_SIZE"],
+        interval=app.config["TRACING_EXPORT_INTERVAL"],
     )
+    FlaskMiddleware(app, exporter=exporter, sampler=ProbabilitySampler(min(sample_rate, 1.0)))
+    app.extensions["span_exporter"] = exporter
+    return exporter
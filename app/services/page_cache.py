@@ -0,0 +1,111 @@
+"""Rendered-page cache for anonymous visitors.
+
+Logged-out readers all see the same HTML for a given URL, so ``cached_page``
+stores the rendered body keyed by endpoint, view arguments and query string.
+The post and comment write services drop the affected entries, and ``PAGE_CACHE_TTL``
+bounds staleness for writes handled by other worker processes. Responses carry
+an ``ETag`` so browsers and proxies revalidate with a cheap 304. Compressed
+variants of a page are kept with it, so a hit does no compression work.
+"""
+
+import hashlib
+from functools import wraps
+from typing import NamedTuple
+
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+
+from .cache import get_cache
+from .compression import compress_cached
+from .monitoring import Counter
+
+PAGE_CACHE_HITS = Counter("page_cache_hits_total", "Anonymous page cache hits", ["endpoint"])
+PAGE_CACHE_MISSES = Counter("page_cache_misses_total", "Anonymous page cache misses", ["endpoint"])
+PAGE_CACHE_EVICTIONS = Counter(
+    "page_cache_evictions_total", "Anonymous pages evicted to respect the size bound", ["endpoint"]
+)
+
+
+class CachedPage(NamedTuple):
+    endpoint: str
+    view_args: dict
+    body: bytes
+    mimetype: str
+    etag: str
+    encoded: dict  # encoding -> compressed body, filled on first request
+
+
+def _cacheable_request() -> bool:
+    return (
+        current_app.config["PAGE_CACHE_ENABLED"]
+        and request.method in ("GET", "HEAD")
+        and not current_user.is_authenticated
+        # Flashed messages are rendered into the page and consumed by it.
+        and "_flashes" not in session
+    )
+
+
+def _cache_key(view_args: dict):
+    return (
+        request.endpoint,
+        tuple(sorted(view_args.items())),
+        tuple(sorted(request.args.items(multi=True))),
+    )
+
+
+def _respond(page: CachedPage):
+    if request.if_none_match.contains_weak(page.etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(page.etag)
+    else:
+        response = current_app.response_class(page.body, mimetype=page.mimetype)
+        response.set_etag(page.etag)
+        compress_cached(response, page.encoded)
+    response.headers["Cache-Control"] = "public, no-cache"
+    response.vary.add("Cookie")
+    return response
+
+
+def cached_page(view):
+    """Serve ``view`` from the page cache for anonymous GET requests."""
+
+    @wraps(view)
+    def wrapper(**view_args):
+        if not _cacheable_request():
+            return view(**view_args)
+
+        cache = get_cache("pages")
+        key = _cache_key(view_args)
+        page = cache.get(key)
+        if page is not None:
+            PAGE_CACHE_HITS.labels(endpoint=request.endpoint).inc()
+            return _respond(page)
+
+        PAGE_CACHE_MISSES.labels(endpoint=request.endpoint).inc()
+        response = make_response(view(**view_args))
+        if response.status_code != 200 or response.is_streamed or "Set-Cookie" in response.headers:
+            return response
+        body = response.get_data()
+        page = CachedPage(
+            endpoint=request.endpoint,
+            view_args=dict(view_args),
+            body=body,
+            mimetype=response.mimetype,
+            etag=hashlib.sha1(body).hexdigest(),
+            encoded={},
+        )
+        cache.set(key, page)
+        return _respond(page)
+
+    return wrapper
+
+
+def invalidate_pages(endpoint: str, **view_args) -> int:
+    """Drop cached pages of ``endpoint`` whose view arguments match ``view_args``."""
+
+    def matches(key, page):
+        return page.endpoint == endpoint and all(
+            page.view_args.get(name) == value for name, value in view_args.items()
+        )
+
+    return get_cache("pages").pop_matching(matches)
@@ -1,10 +1,17 @@
+import base64
+import binascii
+import json
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
 
-from sqlalchemy import text
+from sqlalchemy import func, select, text, tuple_, update
+from sqlalchemy.orm import joinedload
 
 from ..extensions import db
 from ..models import Comment, Post
+from .cache import get_cache
+from .page_cache import invalidate_pages
+from .search import apply_search
 
 FLAIRS: List[Tuple[str, str]] = [
     ("TRADE_HELP", "TRADE HELP"),
@@ -13,6 +20,35 @@ FLAIRS: List[Tuple[str, str]] = [
     ("OTHER", "OTHER"),
 ]
 
+FEED_PAGE_SIZE = 20
+COMMENTS_PAGE_SIZE = 50
+COMMENTS_MAX_PAGE_SIZE = 200
+
+
+class FeedPage(NamedTuple):
+    items: List[Post]
+    older: Optional[str]
+    newer: Optional[str]
+
+
+def encode_cursor(row) -> str:
+    """Return an opaque cursor for the ``(date_posted, id)`` position of a post or comment."""
+
+    raw = f"{row.date_posted.isoformat()}|{row.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by ``encode_cursor``; raise ``ValueError`` if malformed."""
+
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        stamp, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(stamp), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError(f"invalid cursor: {token!r}") from exc
+
 
 def ensure_flair_column():
     rows = db.session.execute(text("PRAGMA table_info(post)")).fetchall()
@@ -24,17 +60,66 @@ def ensure_flair_column():
         db.session.commit()
 
 
-def list_posts(selected_flair: Optional[str] = None):
-    query = Post.query
+def recount_comments() -> int:
+    """Recompute ``Post.comment_count`` from the comment table; return rows fixed."""
+
+    actual = (
+        select(func.count(Comment.id))
+        .where(Comment.post_id == Post.id)
+        .scalar_subquery()
+    )
+    result = db.session.execute(
+        update(Post).where(Post.comment_count != actual).values(comment_count=actual),
+        execution_options={"synchronize_session": False},
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def list_posts(
+    selected_flair: Optional[str] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = FEED_PAGE_SIZE,
+) -> FeedPage:
+    """Return one keyset page of the feed, newest first, with authors joined in.
+
+    ``before`` pages towards older posts and ``after`` towards newer ones; both
+    are cursors from ``encode_cursor``. Invalid cursors fall back to the first page.
+    """
+
+    query = Post.query.options(joinedload(Post.author))
     if selected_flair:
         query = query.filter_by(flair=selected_flair)
-    return query.order_by(Post.date_posted.desc()).all()
+    position = tuple_(Post.date_posted, Post.id)
+
+    try:
+        if after:
+            query = query.filter(position > tuple_(*decode_cursor(after)))
+            rows = query.order_by(Post.date_posted.asc(), Post.id.asc()).limit(limit + 1).all()
+            items = list(reversed(rows[:limit]))
+            if not items:
+                return list_posts(selected_flair, limit=limit)
+            newer = encode_cursor(items[0]) if len(rows) > limit else None
+            older = encode_cursor(items[-1])
+            return FeedPage(items, older, newer)
+        if before:
+            query = query.filter(position < tuple_(*decode_cursor(before)))
+    except ValueError:
+        return list_posts(selected_flair, limit=limit)
+
+    rows = query.order_by(Post.date_posted.desc(), Post.id.desc()).limit(limit + 1).all()
+    items = rows[:limit]
+    older = encode_cursor(items[-1]) if len(rows) > limit else None
+    newer = encode_cursor(items[0]) if before and items else None
+    return FeedPage(items, older, newer)
 
 
 def create_post(title: str, flair: str, content: str, author) -> Post:
-    post = Post(title=title, flair=flair, content=content, author=author)
+    post = Post(title=title, flair=flair, content=content, user_id=author.id)
     db.session.add(post)
     db.session.commit()
+    _invalidate_post_views(post.id, author.username)
     return post
 
 
@@ -43,12 +128,39 @@ def update_post(post: Post, title: str, flair: str, content: str) -> Post:
     post.flair = flair
     post.content = content
     db.session.commit()
+    _invalidate_post_views(post.id, post.author.username)
     return post
 
 
 def delete_post(post: Post) -> None:
+    post_id, username = post.id, post.author.username
     db.session.delete(post)
     db.session.commit()
+    _invalidate_post_views(post_id, username)
+
+
+def _invalidate_post_views(post_id: int, username: str) -> None:
+    invalidate_stats()
+    invalidate_pages("home")
+    invalidate_pages("post_detail", post_id=post_id)
+    invalidate_pages("user_profile", username=username)
+
+
+def posts_version():
+    """Return ``(row count, latest updated_at)`` of the post table.
+
+    Any post create, edit, delete or comment change moves one of the two, so
+    together they make an ETag. A delete can leave the latest ``updated_at``
+    unchanged, so it is not a valid ``Last-Modified`` for post listings.
+
+    These are two statements on purpose. SQLite answers a bare ``count(*)``
+    and a lone ``max()`` on an indexed column without scanning the table, but
+    it scans the whole table when both are in one query.
+    """
+
+    count = db.session.scalar(select(func.count()).select_from(Post))
+    latest = db.session.scalar(select(func.max(Post.updated_at)))
+    return count, latest
 
 
 def post_to_dict(post: Post, with_content: bool = False):
@@ -59,24 +171,82 @@ def post_to_dict(post: Post, with_content: bool = False):
         "author": post.author.username,
         "user_id": post.user_id,
         "date_posted": post.date_posted.isoformat(),
-        "comments_count": len(post.comments),
+        "comments_count": post.comment_count,
     }
     if with_content:
         base["content"] = post.content
     return base
 
 
-def paginate_posts(flair: Optional[str], q_text: str, page: int, per_page: int):
+def _filtered_posts(flair: Optional[str], q_text: str, ranked: bool = False):
     query = Post.query
     if flair:
         query = query.filter_by(flair=flair)
     if q_text:
+        searched = apply_search(query, q_text, ranked=ranked)
+        if searched is not None:
+            return searched
         like = f"%{q_text}%"
         query = query.filter((Post.title.ilike(like)) | (Post.content.ilike(like)))
+    return query
+
+
+def paginate_posts(flair: Optional[str], q_text: str, page: int, per_page: int):
+    query = _filtered_posts(flair, q_text, ranked=True).options(joinedload(Post.author))
     return query.order_by(Post.date_posted.desc()).paginate(page=page, per_page=per_page)
 
 
-def comments_payload(post: Post):
+def cursor_posts(
+    flair: Optional[str],
+    q_text: str,
+    cursor: Optional[str],
+    limit: int,
+    with_total: bool = False,
+):
+    """Return one keyset page for the API without ``COUNT(*)`` or ``OFFSET`` scans.
+
+    Raises ``ValueError`` for a malformed ``cursor``. ``total`` is only computed
+    when ``with_total`` is set.
+    """
+
+    query = _filtered_posts(flair, q_text)
+    total = query.order_by(None).count() if with_total else None
+    if cursor:
+        query = query.filter(tuple_(Post.date_posted, Post.id) < tuple_(*decode_cursor(cursor)))
+    rows = (
+        query.options(joinedload(Post.author))
+        .order_by(Post.date_posted.desc(), Post.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1]) if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor, "total": total}
+
+
+def comment_page(post: Post, limit: int = COMMENTS_PAGE_SIZE, after: Optional[str] = None):
+    """Return up to ``limit`` comments of ``post``, oldest first, after cursor ``after``.
+
+    Ordering and paging run in the database on ``(date_posted, id)``; authors
+    are loaded in the same query. Raises ``ValueError`` for a malformed cursor.
+    """
+
+    query = Comment.query.filter(Comment.post_id == post.id)
+    if after:
+        query = query.filter(tuple_(Comment.date_posted, Comment.id) > tuple_(*decode_cursor(after)))
+    rows = (
+        query.options(joinedload(Comment.author))
+        .order_by(Comment.date_posted, Comment.id)
+        .limit(limit + 1)
+        .all()
+    )
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1]) if len(rows) > limit else None
+    return items, next_cursor
+
+
+def comments_payload(post: Post, limit: int = COMMENTS_PAGE_SIZE, after: Optional[str] = None):
+    items, next_cursor = comment_page(post, limit, after)
     data = [
         {
             "id": c.id,
@@ -86,20 +256,41 @@ def comments_payload(post: Post):
             "content": c.content,
             "date_posted": c.date_posted.isoformat(),
         }
-        for c in sorted(post.comments, key=lambda x: x.date_posted)
+        for c in items
     ]
-    return {"items": data, "total": len(data)}
+    return {"items": data, "total": post.comment_count, "limit": limit, "next_cursor": next_cursor}
 
 
 def stats_payload():
-    counts = {
-        "TRADE_HELP": Post.query.filter_by(flair="TRADE_HELP").count(),
-        "WAIVER_WIRE": Post.query.filter_by(flair="WAIVER_WIRE").count(),
-        "INJURY_TALK": Post.query.filter_by(flair="INJURY_TALK").count(),
-        "OTHER": Post.query.filter_by(flair="OTHER").count(),
-        "TOTAL": Post.query.count(),
-    }
-    latest = Post.query.order_by(Post.date_posted.desc()).limit(5).all()
+    """Return per-flair counts and the latest posts, served from the stats cache."""
+
+    cache = get_cache("stats")
+    payload = cache.get("stats")
+    if payload is None:
+        payload = _build_stats_payload()
+        cache.set("stats", payload)
+    return payload
+
+
+def invalidate_stats() -> None:
+    get_cache("stats").pop("stats")
+
+
+def _build_stats_payload():
+    counts = {value: 0 for value, _ in FLAIRS}
+    total = 0
+    for flair, count in db.session.query(Post.flair, func.count(Post.id)).group_by(Post.flair):
+        if flair in counts:
+            counts[flair] = count
+        total += count
+    counts["TOTAL"] = total
+
+    latest = (
+        Post.query.options(joinedload(Post.author))
+        .order_by(Post.date_posted.desc(), Post.id.desc())
+        .limit(5)
+        .all()
+    )
     latest_items = [
         {
             "id": p.id,
@@ -113,13 +304,73 @@ def stats_payload():
     return {"counts": counts, "latest": latest_items}
 
 
-def export_posts_data():
-    posts = Post.query.order_by(Post.date_posted.desc()).all()
-    return [post_to_dict(post, with_content=True) for post in posts]
+EXPORT_BATCH_SIZE = 500
+
+
+def iter_export_posts(
+    flair: Optional[str] = None,
+    since: Optional[datetime] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[List[dict]]:
+    """Yield export records newest first, one keyset batch at a time.
+
+    Each batch is released from the session before the next is read, so memory
+    stays bounded by ``batch_size`` however large the table is.
+    """
+
+    query = Post.query.options(joinedload(Post.author))
+    if flair:
+        query = query.filter_by(flair=flair)
+    if since:
+        query = query.filter(Post.date_posted >= since)
+    query = query.order_by(Post.date_posted.desc(), Post.id.desc())
+
+    position = None
+    while True:
+        page = query
+        if position is not None:
+            page = page.filter(tuple_(Post.date_posted, Post.id) < position)
+        rows = page.limit(batch_size).all()
+        if not rows:
+            return
+        position = tuple_(rows[-1].date_posted, rows[-1].id)
+        batch = [post_to_dict(post, with_content=True) for post in rows]
+        for post in rows:
+            db.session.expunge(post)
+        yield batch
+        if len(rows) < batch_size:
+            return
+
+
+def export_chunks(batches: Iterable[List[dict]], fmt: str = "json") -> Iterator[str]:
+    """Encode export batches as a streamed JSON array or as NDJSON lines."""
+
+    if fmt == "ndjson":
+        for batch in batches:
+            yield "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in batch)
+        return
+
+    yield "["
+    first = True
+    for batch in batches:
+        encoded = ",\n".join(json.dumps(item, ensure_ascii=False) for item in batch)
+        yield ("\n" if first else ",\n") + encoded
+        first = False
+    yield "\n]\n"
 
 
 def add_comment(post: Post, author, content: str) -> Comment:
-    comment = Comment(content=content, author=author, post=post)
+    comment = Comment(content=content, user_id=author.id, post=post)
     db.session.add(comment)
+    post.comment_count = Post.comment_count + 1
     db.session.commit()
+    invalidate_pages("post_detail", post_id=post.id)
     return comment
+
+
+def delete_comment(comment: Comment) -> None:
+    post = comment.post
+    db.session.delete(comment)
+    post.comment_count = Post.comment_count - 1
+    db.session.commit()
+    invalidate_pages("post_detail", post_id=post.id)
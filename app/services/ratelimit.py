@@ -0,0 +1,203 @@
+"""Token-bucket rate limiting for expensive endpoints.
+
+Each limited view belongs to a scope ("search", "export", "write"). The scopes
+are configured in ``RATELIMIT_RULES`` as ``"<count>/<second|minute|hour>"``, so
+a client gets ``count`` requests per period plus a burst of the same size.
+Every request draws on a bucket for its IP address, and a logged-in request
+also on one for its user id. A request over either budget gets ``429`` with
+``Retry-After``. Behind a reverse proxy, set ``TRUSTED_PROXY_COUNT`` so the IP
+is the client's and not the proxy's.
+
+Buckets live in a backend chosen by ``RATELIMIT_STORAGE_URI``:
+
+* ``memory://``: per process, bounded LRU (the default);
+* ``sqlite:///path/to/buckets.db``: one file shared by every worker process
+  on a host.
+
+Any object with ``consume(key, rate, burst, now)`` can stand in as a backend.
+"""
+
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from flask import current_app, jsonify, make_response, request
+from flask_login import current_user
+
+from .monitoring import Counter
+
+RATELIMIT_DECISIONS = Counter(
+    "ratelimit_requests_total", "Rate-limited endpoint requests by outcome", ["scope", "outcome"]
+)
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+class Rule(NamedTuple):
+    rate: float  # tokens added per second
+    burst: int  # bucket capacity
+
+
+def parse_rule(spec: str) -> Rule:
+    """Parse ``"30/minute"`` into a ``Rule``; raise ``ValueError`` if malformed."""
+
+    try:
+        count, period = spec.split("/", 1)
+        count = int(count)
+        seconds = _PERIODS[period.strip().rstrip("s")]
+    except (KeyError, ValueError) as exc:
+        raise ValueError(f"invalid rate limit: {spec!r}") from exc
+    if count < 1:
+        raise ValueError(f"invalid rate limit: {spec!r}")
+    return Rule(count / seconds, count)
+
+
+def _take(tokens: float, updated: float, rate: float, burst: int, now: float) -> Tuple[bool, float, float]:
+    """Refill a bucket and try to take one token; return ``(allowed, tokens, retry_after)``."""
+
+    tokens = min(burst, tokens + max(now - updated, 0) * rate)
+    if tokens >= 1:
+        return True, tokens - 1, 0.0
+    return False, tokens, (1 - tokens) / rate
+
+
+class MemoryBackend:
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, rate: float, burst: int, now: float) -> Tuple[bool, float]:
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (burst, now))
+            allowed, tokens, retry_after = _take(tokens, updated, rate, burst, now)
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+
+class SQLiteBackend:
+    """Buckets in a SQLite file so every worker process on a host shares them."""
+
+    PRUNE_EVERY = 1000
+    PRUNE_AFTER = 3600
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._calls = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ratelimit_bucket "
+                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def consume(self, key: str, rate: float, burst: int, now: float) -> Tuple[bool, float]:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM ratelimit_bucket WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated = row if row else (burst, now)
+            allowed, tokens, retry_after = _take(tokens, updated, rate, burst, now)
+            conn.execute(
+                "INSERT OR REPLACE INTO ratelimit_bucket (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now),
+            )
+            self._calls += 1
+            if self._calls % self.PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM ratelimit_bucket WHERE updated < ?", (now - self.PRUNE_AFTER,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, retry_after
+
+
+def backend_from_uri(uri: str, max_keys: int = 10000):
+    if uri.startswith("memory://"):
+        return MemoryBackend(max_keys)
+    if uri.startswith("sqlite:///"):
+        return SQLiteBackend(uri[len("sqlite:///"):])
+    raise ValueError(f"unsupported RATELIMIT_STORAGE_URI: {uri!r}")
+
+
+class RateLimiter:
+    def __init__(self, backend, rules: dict, clock: Callable[[], float] = time.time):
+        self.backend = backend
+        self.rules = {scope: parse_rule(spec) for scope, spec in rules.items()}
+        self.clock = clock
+
+    def hit(self, scope: str, identity: str) -> Tuple[bool, float]:
+        """Charge one request to ``identity`` in ``scope``; return ``(allowed, retry_after)``."""
+
+        rule = self.rules.get(scope)
+        if rule is None:
+            return True, 0.0
+        return self.backend.consume(f"{scope}:{identity}", rule.rate, rule.burst, self.clock())
+
+
+def init_rate_limiter(app) -> None:
+    app.extensions["ratelimiter"] = RateLimiter(
+        backend_from_uri(app.config["RATELIMIT_STORAGE_URI"], app.config["RATELIMIT_MAX_KEYS"]),
+        app.config["RATELIMIT_RULES"],
+    )
+
+
+def _client_identities() -> List[str]:
+    """Every bucket a request draws on: its IP, plus the user when signed in.
+
+    Charging the IP too stops one address from rotating through accounts to
+    get a fresh budget each time.
+    """
+
+    identities = [f"ip:{request.remote_addr}"]
+    if current_user.is_authenticated:
+        identities.append(f"user:{current_user.id}")
+    return identities
+
+
+def _too_many_requests(retry_after: float):
+    if request.path.startswith("/api/"):
+        response = make_response(jsonify({"error": "rate limit exceeded"}), 429)
+    else:
+        response = make_response("Too many requests, please slow down.", 429)
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def rate_limited(scope: str, when: Optional[Callable[[], bool]] = None):
+    """Charge each call of the view to the ``scope`` budget (only when ``when()`` is true)."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if current_app.config["RATELIMIT_ENABLED"] and (when is None or when()):
+                limiter = current_app.extensions["ratelimiter"]
+                results = [limiter.hit(scope, identity) for identity in _client_identities()]
+                allowed = all(ok for ok, _ in results)
+                retry_after = max(wait for _, wait in results)
+                RATELIMIT_DECISIONS.labels(
+                    scope=scope, outcome="allowed" if allowed else "limited"
+                ).inc()
+                if not allowed:
+                    return _too_many_requests(retry_after)
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
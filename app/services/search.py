@@ -0,0 +1,172 @@
+"""SQLite FTS5 full-text index over post titles and content.
+
+The ``post_fts`` table uses ``post`` as external content and is kept current
+by triggers, so every write path (services, bulk inserts, raw SQL) is indexed.
+When the SQLite build lacks FTS5, or the database is not SQLite, callers fall
+back to the ``LIKE`` search in ``app.services.posts``.
+"""
+
+import html
+import re
+import weakref
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import column, event, exc, func, literal_column, select, table, text
+
+from ..extensions import db
+from ..models import Job, Post
+from .jobs import enqueue, job
+
+FTS_TABLE = "post_fts"
+post_fts = table(FTS_TABLE, column("rowid"))
+
+_TRIGGERS = ("post_fts_ai", "post_fts_ad", "post_fts_au")
+_CREATE_STATEMENTS = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "title, content, content='post', content_rowid='id', tokenize='unicode61')",
+    f"""CREATE TRIGGER IF NOT EXISTS post_fts_ai AFTER INSERT ON post BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS post_fts_ad AFTER DELETE ON post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS post_fts_au AFTER UPDATE OF title, content ON post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+)
+
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
+
+# Whether each engine has the index. It only changes when the index is
+# installed or dropped through this module, so it is looked up once per engine.
+_available: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def install_search_index(connection) -> bool:
+    """Create the index and triggers on ``connection``; rebuild if any were missing."""
+
+    if connection.dialect.name != "sqlite":
+        return False
+    existing = {
+        row[0]
+        for row in connection.execute(
+            text("SELECT name FROM sqlite_master WHERE name IN (:t, :a, :b, :c)"),
+            {"t": FTS_TABLE, "a": _TRIGGERS[0], "b": _TRIGGERS[1], "c": _TRIGGERS[2]},
+        )
+    }
+    if existing != {FTS_TABLE, *_TRIGGERS}:
+        try:
+            with connection.begin_nested():
+                for statement in _CREATE_STATEMENTS:
+                    connection.execute(text(statement))
+                connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        except exc.OperationalError:  # pragma: no cover - SQLite built without FTS5
+            _available[connection.engine] = False
+            return False
+    _available[connection.engine] = True
+    return True
+
+
+@event.listens_for(Post.__table__, "after_create")
+def _create_index(target, connection, **kw):  # noqa: WPS430
+    install_search_index(connection)
+
+
+@event.listens_for(Post.__table__, "before_drop")
+def _drop_index(target, connection, **kw):  # noqa: WPS430
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+        _available[connection.engine] = False
+
+
+def ensure_search_index() -> bool:
+    """Install (or repair) the full-text index on an existing database."""
+
+    available = install_search_index(db.session.connection())
+    db.session.commit()
+    return available
+
+
+def search_available() -> bool:
+    """Whether the current engine has the index, checked once and then cached."""
+
+    engine = db.session.get_bind()
+    if engine not in _available:
+        found = engine.dialect.name == "sqlite" and db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE},
+        ).first()
+        _available[engine] = bool(found)
+    return _available[engine]
+
+
+def forget_search_availability() -> None:
+    """Re-check the index on next use (after dropping it by hand, say)."""
+
+    _available.pop(db.session.get_bind(), None)
+
+
+@job("optimize_search_index")
+def optimize_search_index() -> None:
+    """Merge the index into a single b-tree, as a bulk import leaves it in many segments."""
+
+    if search_available():
+        db.session.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"))
+        db.session.commit()
+
+
+def schedule_search_optimize() -> None:
+    """Queue ``optimize_search_index`` unless one is already waiting; the caller commits."""
+
+    waiting = select(Job.id).where(Job.name == "optimize_search_index", Job.status == "pending").limit(1)
+    if search_available() and db.session.scalar(waiting) is None:
+        enqueue("optimize_search_index", {})
+
+
+def fts_query(q_text: str) -> Optional[str]:
+    """Turn free text into an FTS5 prefix query, quoting every token."""
+
+    tokens = re.findall(r"\w+", q_text)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def apply_search(query, q_text: str, ranked: bool = False):
+    """Restrict ``query`` to posts matching ``q_text``; return ``None`` if FTS can't serve it.
+
+    With ``ranked`` the results are ordered by bm25 relevance first.
+    """
+
+    match = fts_query(q_text)
+    if match is None or not search_available():
+        return None
+    query = query.join(post_fts, post_fts.c.rowid == Post.id).filter(
+        literal_column(FTS_TABLE).op("MATCH")(match)
+    )
+    if ranked:
+        query = query.order_by(func.bm25(literal_column(FTS_TABLE)))
+    return query
+
+
+def search_snippets(q_text: str, post_ids: Iterable[int]) -> Dict[int, str]:
+    """Return HTML-safe snippets with ``<mark>`` around matches, keyed by post id."""
+
+    ids = list(post_ids)
+    match = fts_query(q_text)
+    if not ids or match is None or not search_available():
+        return {}
+    rows = db.session.execute(
+        text(
+            f"SELECT rowid, snippet({FTS_TABLE}, -1, :open, :close, '…', 12) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH :match AND rowid IN ({', '.join(str(int(i)) for i in ids)})"
+        ),
+        {"open": _MARK_OPEN, "close": _MARK_CLOSE, "match": match},
+    )
+    return {
+        row[0]: html.escape(row[1]).replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
+        for row in rows
+    }
@@ -0,0 +1,132 @@
+"""Per-request SQL instrumentation.
+
+SQLAlchemy cursor events time every statement run while a request is in
+progress. When the request ends, its query count and total database time go
+to per-endpoint histograms. The statements are also checked for two things:
+
+* the same SQL text executed ``SQL_N_PLUS_ONE_THRESHOLD`` or more times in one
+  request is logged and counted as a likely N+1 loop;
+* any statement slower than ``SQL_SLOW_QUERY_MS`` is written to the
+  ``app.sql.slow`` logger (statement text only, never parameters).
+
+With ``SQL_SERVER_TIMING`` on, the totals are also sent as a ``Server-Timing``
+header for browser dev tools. The per-statement cost is two
+``perf_counter`` calls and a dict update.
+"""
+
+import logging
+import time
+from collections import Counter as Tally
+from typing import List, Tuple
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from .monitoring import Counter, Histogram, endpoint_label
+
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "SQL statements executed while handling a request",
+    ["endpoint"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds",
+    "Total time spent in SQL statements while handling a request",
+    ["endpoint"],
+)
+N_PLUS_ONE_DETECTED = Counter(
+    "db_n_plus_one_total", "Requests that repeated one SQL statement past the N+1 threshold", ["endpoint"]
+)
+SLOW_QUERIES = Counter("db_slow_queries_total", "SQL statements slower than SQL_SLOW_QUERY_MS", ["endpoint"])
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger("app.sql.slow")
+
+
+class QueryStats:
+    """Statements seen during one request."""
+
+    __slots__ = ("count", "total", "statements", "slowest", "slow_threshold")
+
+    def __init__(self, slow_threshold: float):
+        self.count = 0
+        self.total = 0.0
+        self.statements: Tally = Tally()
+        self.slowest: List[Tuple[float, str]] = []
+        self.slow_threshold = slow_threshold
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total += duration
+        self.statements[statement] += 1
+        if duration >= self.slow_threshold:
+            self.slowest.append((duration, statement))
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info["query_start"].pop()
+    if has_request_context():
+        stats = g.get("sql_stats")
+        if stats is not None:
+            stats.record(statement, time.perf_counter() - start)
+
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def _short(statement: str, limit: int = 200) -> str:
+    flat = " ".join(statement.split())
+    return flat if len(flat) <= limit else flat[:limit] + "..."
+
+
+def start_request_stats():
+    g.sql_stats = QueryStats(current_app.config["SQL_SLOW_QUERY_MS"] / 1000)
+
+
+def finish_request_stats(response):
+    stats = g.pop("sql_stats", None)
+    if stats is None:
+        return response
+    config = current_app.config
+    endpoint = endpoint_label()
+    DB_QUERIES_PER_REQUEST.labels(endpoint=endpoint).observe(stats.count)
+    DB_TIME_PER_REQUEST.labels(endpoint=endpoint).observe(stats.total)
+
+    for duration, statement in stats.slowest:
+        SLOW_QUERIES.labels(endpoint=endpoint).inc()
+        slow_logger.warning(
+            "slow query (%.1f ms) on %s %s: %s", duration * 1000, request.method, request.path, _short(statement)
+        )
+    repeated = stats.repeated(config["SQL_N_PLUS_ONE_THRESHOLD"])
+    if repeated:
+        N_PLUS_ONE_DETECTED.labels(endpoint=endpoint).inc()
+        sql, times = repeated[0]
+        logger.warning("possible N+1 on %s: %d x %s", endpoint, times, _short(sql))
+
+    if config["SQL_SERVER_TIMING"]:
+        response.headers.add(
+            "Server-Timing", f'db;dur={stats.total * 1000:.1f};desc="{stats.count} queries"'
+        )
+    return response
+
+
+def register_sql_instrumentation(app, engine) -> None:
+    if not app.config["SQL_INSTRUMENTATION_ENABLED"]:
+        return
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+    app.before_request(start_request_stats)
+    app.after_request(finish_request_stats)
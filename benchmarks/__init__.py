@@ -0,0 +1,8 @@
+"""Load and latency benchmarks for the forum's hot endpoints.
+
+``python -m benchmarks seed`` fills a database with a synthetic dataset.
+``python -m benchmarks run`` drives the hot endpoints at a fixed concurrency
+and writes the latency, throughput, queries-per-request and peak RSS figures
+as JSON. ``python -m benchmarks compare`` checks a result file against a
+stored baseline. See ``python -m benchmarks --help``.
+"""
@@ -0,0 +1,82 @@
+import argparse
+import json
+import os
+import sys
+
+from .compare import format_table, regressions
+from .seed import DatasetSize
+from .suite import ensure_dataset, make_app, parse_overrides, run_suite
+
+DEFAULT_DATABASE = "sqlite:///" + os.path.join(os.path.abspath(os.path.dirname(__file__)), ".data", "bench.db")
+
+
+def _dataset_args(parser):
+    parser.add_argument("--database-url", default=os.environ.get("BENCH_DATABASE_URL", DEFAULT_DATABASE))
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--posts", type=int, default=200_000)
+    parser.add_argument("--comments", type=int, default=2_000_000)
+    parser.add_argument("--seed", type=int, default=1, help="random seed, for reproducible datasets and paths")
+    parser.add_argument("-c", "--config", action="append", metavar="KEY=VALUE",
+                        help="app config override, e.g. -c PAGE_CACHE_ENABLED=false (repeatable)")
+
+
+def _compare(result, baseline_path, threshold) -> int:
+    with open(baseline_path, encoding="utf-8") as src:
+        baseline = json.load(src)
+    found = regressions(result, baseline, threshold)
+    for line in found:
+        print(f"REGRESSION {line}")
+    if not found:
+        print(f"no regressions beyond {threshold:.0%} against {baseline_path}")
+    return 1 if found else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Forum load benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="create and fill the benchmark database")
+    _dataset_args(seed_parser)
+
+    run_parser = commands.add_parser("run", help="benchmark the hot endpoints (seeds an empty database first)")
+    _dataset_args(run_parser)
+    run_parser.add_argument("--requests", type=int, default=200, help="requests per endpoint (export gets 5%%)")
+    run_parser.add_argument("--concurrency", type=int, default=8)
+    run_parser.add_argument("--url", help="benchmark a running server instead of the in-process test client")
+    run_parser.add_argument("--server-pid", type=int,
+                            help="with --url, report this process's peak RSS (Linux; otherwise none is reported)")
+    run_parser.add_argument("--out", help="write the JSON result here")
+    run_parser.add_argument("--baseline", help="compare against this JSON result and fail on regressions")
+    run_parser.add_argument("--threshold", type=float, default=0.2, help="allowed regression ratio (default 0.2)")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("result")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.result, encoding="utf-8") as src:
+            return _compare(json.load(src), args.baseline, args.threshold)
+
+    if args.database_url.startswith("sqlite:///"):
+        os.makedirs(os.path.dirname(os.path.abspath(args.database_url[len("sqlite:///"):])), exist_ok=True)
+    app = make_app(args.database_url, parse_overrides(args.config))
+    ensure_dataset(app, DatasetSize(args.users, args.posts, args.comments), args.seed)
+    if args.command == "seed":
+        return 0
+
+    result = run_suite(
+        app, args.requests, args.concurrency, base_url=args.url, server_pid=args.server_pid, seed_value=args.seed
+    )
+    print(format_table(result))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as out:
+            json.dump(result, out, indent=2)
+    if args.baseline:
+        return _compare(result, args.baseline, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
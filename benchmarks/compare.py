@@ -0,0 +1,37 @@
+"""Compare a benchmark result against a stored baseline."""
+
+from typing import List
+
+
+def regressions(result: dict, baseline: dict, threshold: float) -> List[str]:
+    """Describe every endpoint whose p95 latency rose, or throughput fell, by more than ``threshold``."""
+
+    found = []
+    for name, base in baseline.get("endpoints", {}).items():
+        current = result.get("endpoints", {}).get(name)
+        if current is None:
+            found.append(f"{name}: missing from result")
+            continue
+        if base["p95_ms"] and current["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            found.append(f"{name}: p95 {current['p95_ms']:.1f} ms vs baseline {base['p95_ms']:.1f} ms")
+        if base["throughput_rps"] and current["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+            found.append(
+                f"{name}: {current['throughput_rps']:.1f} req/s vs baseline {base['throughput_rps']:.1f} req/s"
+            )
+        if current["errors"] > base["errors"]:
+            found.append(f"{name}: {current['errors']} errors vs baseline {base['errors']}")
+    return found
+
+
+def format_table(result: dict) -> str:
+    header = f"{'endpoint':<12} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'queries':>8} {'errors':>6}"
+    lines = [header, "-" * len(header)]
+    for name, row in result["endpoints"].items():
+        queries = "-" if row["queries_per_request"] is None else f"{row['queries_per_request']:.1f}"
+        lines.append(
+            f"{name:<12} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} "
+            f"{row['throughput_rps']:>9.1f} {queries:>8} {row['errors']:>6}"
+        )
+    if result.get("peak_rss_mb") is not None:
+        lines.append(f"peak RSS: {result['peak_rss_mb']} MiB")
+    return "\n".join(lines)
@@ -0,0 +1,143 @@
+"""Drive endpoints at a fixed concurrency and summarise latency, throughput and queries."""
+
+import math
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+class Endpoint(NamedTuple):
+    name: str
+    path: Callable[[random.Random], str]
+    share: float = 1.0  # fraction of the per-endpoint request count
+
+
+class Sample(NamedTuple):
+    latency: float
+    status: int
+    queries: Optional[int]
+
+
+def hot_endpoints(post_ids: Sequence[int], search_terms: Sequence[str]) -> List[Endpoint]:
+    return [
+        Endpoint("home", lambda rng: "/home"),
+        Endpoint("search", lambda rng: f"/api/posts?q={rng.choice(search_terms)}"),
+        Endpoint("stats", lambda rng: "/api/stats"),
+        Endpoint("post_detail", lambda rng: f"/post/{rng.choice(post_ids)}"),
+        Endpoint("export", lambda rng: "/api/export/posts?format=ndjson", share=0.05),
+    ]
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 when empty)."""
+
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def peak_rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """Peak resident memory of this process, or of ``pid`` (Linux only); ``None`` if unknown."""
+
+    if pid is not None:
+        try:
+            with open(f"/proc/{pid}/status", encoding="ascii") as status:
+                for line in status:
+                    if line.startswith("VmHWM:"):
+                        return round(int(line.split()[1]) / 1024, 1)
+        except OSError:
+            pass
+        return None
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux (bytes on macOS; close enough for trends).
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _queries(header: Optional[str]) -> Optional[int]:
+    match = _QUERIES.search(header or "")
+    return int(match.group(1)) if match else None
+
+
+def client_fetcher(app) -> Callable[[str], Sample]:
+    """Fetch through Flask test clients, one per thread."""
+
+    local = threading.local()
+
+    def fetch(path: str) -> Sample:
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        start = time.perf_counter()
+        response = client.get(path)
+        response.get_data()
+        latency = time.perf_counter() - start
+        response.close()
+        return Sample(latency, response.status_code, _queries(response.headers.get("Server-Timing")))
+
+    return fetch
+
+
+def http_fetcher(base_url: str, timeout: float = 60) -> Callable[[str], Sample]:
+    """Fetch from a running server over HTTP."""
+
+    def fetch(path: str) -> Sample:
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(base_url.rstrip("/") + path, timeout=timeout) as response:
+                response.read()
+                status, timing = response.status, response.headers.get("Server-Timing")
+        except urllib.error.HTTPError as exc:
+            status, timing = exc.code, None
+        return Sample(time.perf_counter() - start, status, _queries(timing))
+
+    return fetch
+
+
+def summarise(samples: List[Sample], elapsed: float) -> Dict[str, float]:
+    latencies = [s.latency * 1000 for s in samples]
+    queries = [s.queries for s in samples if s.queries is not None]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if s.status >= 400),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def run_endpoint(
+    fetch: Callable[[str], Sample],
+    endpoint: Endpoint,
+    requests: int,
+    concurrency: int,
+    warmup: int = 5,
+    seed: int = 1,
+) -> Dict[str, float]:
+    rng = random.Random(seed)
+    count = max(1, int(requests * endpoint.share))
+    paths = [endpoint.path(rng) for _ in range(count)]
+    for path in paths[:warmup]:
+        fetch(path)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        samples = list(pool.map(fetch, paths))
+        elapsed = time.perf_counter() - start
+    return summarise(samples, elapsed)
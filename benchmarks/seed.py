@@ -0,0 +1,118 @@
+"""Synthetic dataset generation through bulk inserts."""
+
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Iterator, List, NamedTuple
+
+from sqlalchemy import func, insert, select
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.models import Comment, Post, User
+from app.services.posts import FLAIRS
+
+WORDS = (
+    "waiver wire sleeper trade injury quarterback rookie running back receiver tight end "
+    "defense kicker playoff bench start sit bye week ppr dynasty keeper draft auction "
+    "target share snap count breakout bust handcuff streamer matchup schedule"
+).split()
+
+
+class DatasetSize(NamedTuple):
+    users: int
+    posts: int
+    comments: int
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _batches(rows: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def thread_sizes(rng: random.Random, posts: int, comments: int, skew: float) -> Counter:
+    """Spread ``comments`` over ``posts`` with Pareto weights: a few huge threads, a long tail."""
+
+    weights = [rng.paretovariate(skew) for _ in range(posts)]
+    return Counter(rng.choices(range(posts), weights=weights, k=comments))
+
+
+def dataset_size() -> DatasetSize:
+    return DatasetSize(
+        db.session.scalar(select(func.count(User.id))),
+        db.session.scalar(select(func.count(Post.id))),
+        db.session.scalar(select(func.count(Comment.id))),
+    )
+
+
+def seed(size: DatasetSize, seed: int = 1, skew: float = 1.2, batch_size: int = 5000, log=print) -> DatasetSize:
+    """Insert ``size`` users, posts and comments (call inside an app context on an empty schema)."""
+
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1)
+    password_hash = generate_password_hash("benchmark", "pbkdf2:sha256:1000")
+
+    users = ({"username": f"user{i}", "email": f"user{i}@example.com", "password_hash": password_hash}
+             for i in range(size.users))
+    for batch in _batches(users, batch_size):
+        db.session.execute(insert(User), batch)
+    db.session.commit()
+    user_ids = list(db.session.scalars(select(User.id).order_by(User.id)))
+    log(f"seeded {len(user_ids)} users")
+
+    sizes = thread_sizes(rng, size.posts, size.comments, skew)
+    posted = [now - timedelta(seconds=rng.randrange(365 * 86400)) for _ in range(size.posts)]
+    posts = (
+        {
+            "title": _text(rng, 6)[:100],
+            "flair": rng.choice(FLAIRS)[0],
+            "content": _text(rng, 40),
+            "user_id": rng.choice(user_ids),
+            "date_posted": posted[i],
+            "updated_at": posted[i],
+            "comment_count": sizes[i],
+        }
+        for i in range(size.posts)
+    )
+    for batch in _batches(posts, batch_size):
+        db.session.execute(insert(Post), batch)
+    db.session.commit()
+    post_ids = list(db.session.scalars(select(Post.id).order_by(Post.id)))
+    log(f"seeded {len(post_ids)} posts")
+
+    comments = (
+        {
+            "content": _text(rng, 15),
+            "user_id": rng.choice(user_ids),
+            "post_id": post_ids[index],
+            "date_posted": posted[index] + timedelta(minutes=n),
+        }
+        for index, count in sizes.items()
+        for n in range(count)
+    )
+    written = 0
+    for batch in _batches(comments, batch_size):
+        db.session.execute(insert(Comment), batch)
+        written += len(batch)
+        if written % (batch_size * 40) == 0:
+            db.session.commit()
+            log(f"  {written} comments")
+    db.session.commit()
+    log(f"seeded {written} comments")
+    return dataset_size()
+
+
+def hot_post_ids(limit: int = 100) -> List[int]:
+    """Ids of the busiest threads, which is where real traffic concentrates."""
+
+    return list(db.session.scalars(select(Post.id).order_by(Post.comment_count.desc()).limit(limit)))
@@ -0,0 +1,93 @@
+"""Glue between the app, the synthetic dataset and the runner."""
+
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from app import create_app
+from app.migrations import prepare_database
+
+from .runner import client_fetcher, http_fetcher, hot_endpoints, peak_rss_mb, run_endpoint
+from .seed import DatasetSize, dataset_size, hot_post_ids, seed
+
+SEARCH_TERMS = ("waiver", "sleeper", "trade", "injury", "rookie", "playoff", "dynasty", "handcuff")
+
+
+def parse_overrides(pairs) -> dict:
+    """Turn ``["KEY=value", ...]`` into config overrides; values are parsed as JSON when possible."""
+
+    overrides = {}
+    for pair in pairs or ():
+        key, _, raw = pair.partition("=")
+        try:
+            overrides[key] = json.loads(raw)
+        except ValueError:
+            overrides[key] = raw
+    return overrides
+
+
+def make_app(database_url: str, overrides: Optional[dict] = None):
+    config = {
+        "SQLALCHEMY_DATABASE_URI": database_url,
+        # The runner hammers one client address; rate limits would turn it into a 429 benchmark.
+        "RATELIMIT_ENABLED": False,
+        # Queries per request are read back from the Server-Timing header.
+        "SQL_SERVER_TIMING": True,
+        # Anonymous page-cache hits would hide the cost of rendering /home and
+        # /post/<id>; pass -c PAGE_CACHE_ENABLED=true to measure the cached path.
+        "PAGE_CACHE_ENABLED": False,
+    }
+    config.update(overrides or {})
+    app = create_app(config)
+    with app.app_context():
+        prepare_database()
+    return app
+
+
+def ensure_dataset(app, size: DatasetSize, seed_value: int = 1, log=print) -> DatasetSize:
+    """Seed an empty database; reuse an already seeded one as is."""
+
+    with app.app_context():
+        current = dataset_size()
+        if any(current):
+            if current != size:
+                log(f"using existing dataset {current._asdict()} (requested {size._asdict()})")
+            return current
+        return seed(size, seed=seed_value, log=log)
+
+
+def run_suite(
+    app,
+    requests: int,
+    concurrency: int,
+    base_url: Optional[str] = None,
+    server_pid: Optional[int] = None,
+    seed_value: int = 1,
+    log: Callable[[str], None] = print,
+) -> dict:
+    with app.app_context():
+        posts = hot_post_ids()
+        size = dataset_size()
+    fetch = http_fetcher(base_url) if base_url else client_fetcher(app)
+    endpoints = {}
+    for endpoint in hot_endpoints(posts or [1], SEARCH_TERMS):
+        log(f"running {endpoint.name} ...")
+        endpoints[endpoint.name] = run_endpoint(fetch, endpoint, requests, concurrency, seed=seed_value)
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "mode": "http" if base_url else "test-client",
+            # In http mode the server's own settings apply.
+            "page_cache": None if base_url else app.config["PAGE_CACHE_ENABLED"],
+            "dataset": size._asdict(),
+            "requests": requests,
+            "concurrency": concurrency,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+        },
+        "endpoints": endpoints,
+        # Over HTTP the memory that matters is the server's; without its pid it is unknown.
+        "peak_rss_mb": peak_rss_mb(server_pid) if base_url else peak_rss_mb(),
+    }
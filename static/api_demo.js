@@ -32,12 +32,18 @@ async function loadStats() {
   }
 }
 
+// Cursor pager: `cursors[i]` is the cursor that loads page i + 1.
+let cursors = [""];
+let searchTotal = null;
+
 async function loadSearch(page = 1) {
   const q = document.getElementById("q").value.trim();
   const flair = document.getElementById("flair").value;
-  const params = new URLSearchParams({ page });
+  const params = new URLSearchParams({ limit: 10, cursor: cursors[page - 1] || "" });
   if (q) params.set("q", q);
   if (flair) params.set("flair", flair);
+  // Only the first page pays for COUNT(*); later pages reuse its total.
+  if (page === 1) params.set("with_total", "1");
 
   const resEl = document.getElementById("results");
   const pagerEl = document.getElementById("pager");
@@ -46,6 +52,7 @@ async function loadSearch(page = 1) {
 
   try {
     const data = await fetchJSON(`/api/posts?${params.toString()}`);
+    if (page === 1) searchTotal = data.total;
     if (!data.items.length) {
       resEl.textContent = "No results.";
       return;
@@ -64,13 +71,15 @@ async function loadSearch(page = 1) {
     `).join("");
 
     // simple pager
-    const { page, pages, total } = data;
+    cursors = cursors.slice(0, page);
+    if (data.next_cursor) cursors.push(data.next_cursor);
     const prev = page > 1 ? `<button class="btn" data-goto="${page - 1}">Prev</button>` : "";
-    const next = page < pages ? `<button class="btn" data-goto="${page + 1}">Next</button>` : "";
+    const next = data.next_cursor ? `<button class="btn" data-goto="${page + 1}">Next</button>` : "";
+    const pages = searchTotal !== null ? Math.max(Math.ceil(searchTotal / 10), 1) : "?";
     pagerEl.innerHTML = `
       <div style="display:flex; align-items:center; gap:.5rem;">
         ${prev}
-        <span>Page ${page} / ${pages} • ${total} results</span>
+        <span>Page ${page} / ${pages} • ${searchTotal ?? "?"} results</span>
         ${next}
       </div>
     `;
@@ -87,6 +96,7 @@ document.addEventListener("DOMContentLoaded", () => {
   const form = document.getElementById("searchForm");
   form.addEventListener("submit", (e) => {
     e.preventDefault();
+    cursors = [""];
     loadSearch(1);
   });
 });
@@ -0,0 +1,14 @@
+// Live activity notice: Server-Sent Events; the browser reconnects with Last-Event-ID every few seconds.
+document.addEventListener("DOMContentLoaded", () => {
+  const notice = document.getElementById("liveNotice");
+  if (!notice || !window.EventSource) return;
+
+  const label = notice.querySelector("[data-label]");
+  const source = new EventSource(`/api/events?channel=${encodeURIComponent(notice.dataset.channel)}`);
+  let count = 0;
+  source.addEventListener(notice.dataset.event, () => {
+    count += 1;
+    label.textContent = `${count} new ${count === 1 ? notice.dataset.one : notice.dataset.many}, refresh to see`;
+    notice.classList.remove("d-none");
+  });
+});
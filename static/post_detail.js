@@ -0,0 +1,27 @@
+// "Load more" for post comments: appends the next server-rendered page.
+document.addEventListener("DOMContentLoaded", () => {
+  const button = document.getElementById("loadMoreComments");
+  const list = document.getElementById("commentList");
+  if (!button || !list) return;
+
+  button.addEventListener("click", async () => {
+    button.disabled = true;
+    try {
+      const url = new URL(button.dataset.url, window.location.origin);
+      url.searchParams.set("after", button.dataset.after);
+      const res = await fetch(url);
+      if (!res.ok) throw new Error(`HTTP ${res.status}`);
+      list.insertAdjacentHTML("beforeend", await res.text());
+      const next = res.headers.get("X-Next-Cursor");
+      if (next) {
+        button.dataset.after = next;
+        button.disabled = false;
+      } else {
+        button.remove();
+      }
+    } catch (e) {
+      button.textContent = "Could not load comments, try again";
+      button.disabled = false;
+    }
+  });
+});
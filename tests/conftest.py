@@ -13,14 +13,13 @@ from app.services.posts import ensure_flair_column
 @pytest.fixture
 def app():
     # Use in-memory DB and disable CSRF for tests
-    flask_app = create_app()
-    flask_app.config.update(
+    flask_app = create_app(dict(
         TESTING=True,
         SECRET_KEY="test-secret",
         SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
         WTF_CSRF_ENABLED=False,
         LOGIN_DISABLED=False,
-    )
+    ))
     with flask_app.app_context():
         db.drop_all()
         db.create_all()
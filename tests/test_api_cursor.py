@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app import db, Post
+
+
+def _seed(user, count):
+    start = datetime(2024, 9, 1)
+    db.session.add_all([
+        Post(title=f"Cursor {i}", flair="OTHER", content="waiver notes", author=user,
+             date_posted=start + timedelta(hours=i))
+        for i in range(count)
+    ])
+    db.session.commit()
+
+
+def test_cursor_mode_walks_all_posts(client, user):
+    _seed(user, 5)
+    seen, cursor = [], ""
+    for _ in range(5):
+        data = client.get(f"/api/posts?limit=2&cursor={cursor}").get_json()
+        assert "total" not in data
+        seen += [item["title"] for item in data["items"]]
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+    assert seen == [f"Cursor {i}" for i in range(4, -1, -1)]
+
+
+def test_cursor_mode_total_only_when_requested(client, user):
+    _seed(user, 3)
+    data = client.get("/api/posts?limit=2&with_total=1&q=waiver").get_json()
+    assert data["total"] == 3
+    assert data["limit"] == 2 and data["next_cursor"]
+
+
+def test_cursor_mode_skips_count_query(app, client, user):
+    _seed(user, 3)
+    statements = []
+
+    def record(*args):
+        statements.append(args[2].lower())
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        client.get("/api/posts?limit=2&q=waiver")
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    # Only the unfiltered validator count from conditional GET may run.
+    assert not any("count(" in s and "match" in s for s in statements)
+
+
+def test_cursor_mode_rejects_bad_cursor(client):
+    r = client.get("/api/posts?cursor=%%%")
+    assert r.status_code == 400
+    assert r.get_json()["error"] == "invalid cursor"
@@ -0,0 +1,56 @@
+import json
+import shutil
+
+from app.services.assets import IMMUTABLE_CACHE_CONTROL, build_assets, load_manifest
+
+
+def test_build_assets_fingerprints_and_prunes(tmp_path):
+    (tmp_path / "js").mkdir()
+    (tmp_path / "js" / "app.js").write_text("console.log('v1');" * 50)
+    (tmp_path / "app.js.gz").write_bytes(b"ignored")
+
+    manifest = build_assets(str(tmp_path))
+    first = manifest["js/app.js"]
+    assert first.startswith("dist/js/app.") and first.endswith(".js")
+    assert "app.js.gz" not in manifest
+    assert (tmp_path / first).read_text() == (tmp_path / "js" / "app.js").read_text()
+    assert (tmp_path / (first + ".gz")).exists()
+    assert json.loads((tmp_path / "dist" / "manifest.json").read_text()) == manifest
+
+    (tmp_path / "js" / "app.js").write_text("console.log('v2');" * 50)
+    second = build_assets(str(tmp_path))["js/app.js"]
+    assert second != first
+    assert not (tmp_path / first).exists()
+    assert not (tmp_path / (first + ".gz")).exists()
+
+
+def test_templates_use_hashed_urls_with_immutable_caching(app, client, tmp_path):
+    static = tmp_path / "static"
+    shutil.copytree(app.static_folder, static, ignore=shutil.ignore_patterns("dist", "*.gz", "*.br"))
+    app.static_folder = str(static)
+    manifest = load_manifest(app, build=True)
+
+    page = client.get("/home").get_data(as_text=True)
+    css = manifest["vendor/bootstrap/bootstrap.min.css"]
+    assert f"/static/{css}" in page
+    assert "cdn.jsdelivr.net" not in page
+
+    r = client.get(f"/static/{css}")
+    assert r.status_code == 200
+    assert r.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+    r.close()
+
+    r = client.get(f"/static/{css}", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert r.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+    r.close()
+
+    r = client.get("/static/api_demo.js")
+    assert r.headers.get("Cache-Control") != IMMUTABLE_CACHE_CONTROL
+    r.close()
+
+
+def test_missing_manifest_falls_back_to_plain_static_urls(app, client, tmp_path):
+    app.static_folder = str(tmp_path)
+    assert load_manifest(app) == {}
+    assert "/static/api_demo.js" in client.get("/api-demo").get_data(as_text=True)
@@ -0,0 +1,46 @@
+import json
+import os
+
+import pytest
+
+from benchmarks.__main__ import main
+from benchmarks.compare import regressions
+from benchmarks.runner import peak_rss_mb, percentile
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 95) == 0.0
+
+
+def test_run_writes_comparable_json(tmp_path):
+    out = tmp_path / "result.json"
+    args = [
+        "run", "--database-url", f"sqlite:///{tmp_path / 'bench.db'}",
+        "--users", "5", "--posts", "40", "--comments", "300",
+        "--requests", "10", "--concurrency", "2", "--out", str(out),
+    ]
+    assert main(args) == 0
+    result = json.loads(out.read_text())
+    assert result["meta"]["dataset"] == {"users": 5, "posts": 40, "comments": 300}
+    assert set(result["endpoints"]) == {"home", "search", "stats", "post_detail", "export"}
+    assert all(row["errors"] == 0 for row in result["endpoints"].values())
+    assert result["endpoints"]["search"]["queries_per_request"] >= 1
+    assert result["meta"]["page_cache"] is False
+    assert result["endpoints"]["home"]["queries_per_request"] >= 1  # rendered, not a cache hit
+
+    assert main(["compare", str(out), str(out)]) == 0
+    slower = json.loads(out.read_text())
+    slower["endpoints"]["search"]["p95_ms"] = result["endpoints"]["search"]["p95_ms"] * 2 + 1
+    assert regressions(slower, result, 0.2) == [
+        f"search: p95 {slower['endpoints']['search']['p95_ms']:.1f} ms "
+        f"vs baseline {result['endpoints']['search']['p95_ms']:.1f} ms"
+    ]
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/status"), reason="needs /proc")
+def test_peak_rss_of_another_process():
+    assert peak_rss_mb(os.getpid()) > 0
+    assert peak_rss_mb(2 ** 22 + 1) is None  # no such pid
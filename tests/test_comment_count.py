@@ -0,0 +1,42 @@
+from app import db, Comment, Post
+from app.services.posts import add_comment, delete_comment, post_to_dict, recount_comments
+
+
+def test_add_and_delete_comment_keep_count(sample_post, user):
+    first = add_comment(sample_post, user, "one")
+    add_comment(sample_post, user, "two")
+    assert db.session.get(Post, sample_post.id).comment_count == 2
+
+    delete_comment(first)
+    assert db.session.get(Post, sample_post.id).comment_count == 1
+    assert post_to_dict(sample_post)["comments_count"] == 1
+
+
+def test_delete_comment_route_author_only(login, sample_post, other_user):
+    mine = add_comment(sample_post, sample_post.author, "mine")
+    theirs = add_comment(sample_post, other_user, "theirs")
+
+    r = login.post(f"/comment/{theirs.id}/delete")
+    assert r.status_code == 403
+
+    r = login.post(f"/comment/{mine.id}/delete", follow_redirects=True)
+    assert r.status_code == 200
+    assert b"Comment deleted" in r.data
+    assert db.session.get(Post, sample_post.id).comment_count == 1
+
+
+def test_recount_repairs_drift(sample_post, user):
+    db.session.add_all([Comment(content="raw", author=user, post=sample_post) for _ in range(3)])
+    db.session.commit()
+    assert sample_post.comment_count == 0
+
+    assert recount_comments() == 1
+    assert db.session.get(Post, sample_post.id).comment_count == 3
+    assert recount_comments() == 0
+
+
+def test_repair_cli_command(app, sample_post, user):
+    db.session.add(Comment(content="raw", author=user, post=sample_post))
+    db.session.commit()
+    result = app.test_cli_runner().invoke(args=["repair-comment-counts"])
+    assert "Repaired comment counts on 1 post(s)." in result.output
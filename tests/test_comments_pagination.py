@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, text
+
+from app import db, Comment
+from app.migrations import run_migrations
+
+
+def _seed(post, users, count=7):
+    start = datetime(2024, 9, 1, 12, 0)
+    # Two comments share each timestamp so the id tie-breaker matters.
+    db.session.add_all([
+        Comment(content=f"c{i}", author=users[i % 2], post=post, date_posted=start + timedelta(minutes=i // 2))
+        for i in range(count)
+    ])
+    post.comment_count = count
+    db.session.commit()
+
+
+def test_pages_walk_comments_in_order(client, sample_post, user, other_user):
+    _seed(sample_post, [user, other_user])
+    seen, after = [], None
+    while True:
+        url = f"/api/posts/{sample_post.id}/comments?limit=3" + (f"&after={after}" if after else "")
+        body = client.get(url).get_json()
+        assert body["total"] == 7 and body["limit"] == 3
+        seen += [c["content"] for c in body["items"]]
+        after = body["next_cursor"]
+        if not after:
+            break
+    assert seen == [f"c{i}" for i in range(7)]
+
+
+def test_authors_load_in_one_query(client, sample_post, user, other_user):
+    _seed(sample_post, [user, other_user])
+    statements = []
+
+    def record(*args):
+        statements.append(args[2].lower())
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        body = client.get(f"/api/posts/{sample_post.id}/comments").get_json()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    assert {c["author"] for c in body["items"]} == {"alice", "bob"}
+    assert body["next_cursor"] is None
+    comment_selects = [s for s in statements if "from comment" in s]
+    assert len(comment_selects) == 1 and "join" in comment_selects[0]
+    assert not any("from user" in s and "from comment" not in s for s in statements)
+
+
+def test_bad_cursor_and_limit(client, sample_post):
+    assert client.get(f"/api/posts/{sample_post.id}/comments?after=%%%").status_code == 400
+    assert client.get(f"/api/posts/{sample_post.id}/comments?limit=abc").get_json()["limit"] == 50
+    assert client.get(f"/api/posts/{sample_post.id}/comments?limit=9999").get_json()["limit"] == 200
+
+
+def test_comment_page_uses_index(app):
+    run_migrations()
+    plan = db.session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM comment WHERE post_id = 1 "
+        "AND (date_posted, id) > ('2024-01-01', 0) ORDER BY date_posted, id LIMIT 51"
+    )).fetchall()
+    detail = " ".join(row[-1] for row in plan)
+    assert "ix_comment_post_id_date_posted_id" in detail
+    assert "TEMP B-TREE" not in detail
@@ -0,0 +1,82 @@
+import gzip
+
+from app import db, Post
+from app.services import compression
+from app.services.compression import precompress_directory
+
+
+def _seed(user, count=20):
+    db.session.add_all([
+        Post(title=f"Long post {i}", flair="OTHER", content="waiver wire breakdown " * 20, author=user)
+        for i in range(count)
+    ])
+    db.session.commit()
+
+
+def test_html_is_gzipped_when_accepted(client, user):
+    _seed(user)
+    plain = client.get("/home")
+    r = client.get("/home", headers={"Accept-Encoding": "gzip, deflate"})
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in r.headers["Vary"]
+    assert gzip.decompress(r.data) == plain.data
+    assert len(r.data) < len(plain.data)
+    assert r.headers["ETag"].startswith('W/"')
+
+
+def test_cached_pages_are_compressed_once(client, user, monkeypatch):
+    _seed(user)
+    calls = []
+    real = compression._compress
+    monkeypatch.setattr(compression, "_compress", lambda *args: calls.append(args[1]) or real(*args))
+    headers = {"Accept-Encoding": "gzip"}
+    bodies = [client.get("/home", headers=headers).data for _ in range(3)]
+    assert calls == ["gzip"] and bodies[0] == bodies[1] == bodies[2]
+    assert b"Long post" in gzip.decompress(bodies[2])
+    assert "Content-Encoding" not in client.get("/home").headers
+
+
+def test_weak_etag_still_revalidates(client, user):
+    _seed(user)
+    headers = {"Accept-Encoding": "gzip"}
+    etag = client.get("/api/posts", headers=headers).headers["ETag"]
+    r = client.get("/api/posts", headers={**headers, "If-None-Match": etag})
+    assert r.status_code == 304
+
+
+def test_small_or_unaccepted_responses_untouched(client, user):
+    _seed(user)
+    assert "Content-Encoding" not in client.get("/health", headers={"Accept-Encoding": "gzip"}).headers
+    assert "Content-Encoding" not in client.get("/home").headers
+    assert "Content-Encoding" not in client.get("/home", headers={"Accept-Encoding": "gzip;q=0"}).headers
+
+
+def test_streamed_export_not_recompressed(client, user):
+    _seed(user)
+    r = client.get("/api/export/posts", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in r.headers
+
+
+def test_precompressed_static_variant(app, client, tmp_path):
+    (tmp_path / "site.css").write_text("body { color: red; }\n" * 100)
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG")
+    assert precompress_directory(str(tmp_path)) == [str(tmp_path / "site.css.gz")]
+    assert precompress_directory(str(tmp_path)) == []
+
+    app.static_folder = str(tmp_path)
+    r = client.get("/static/site.css", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert r.mimetype == "text/css"
+    assert gzip.decompress(r.data).startswith(b"body")
+    r.close()
+    r = client.get("/static/site.css")
+    assert "Content-Encoding" not in r.headers
+    r.close()
+
+
+def test_compression_metrics_exposed(client, user):
+    _seed(user)
+    client.get("/home", headers={"Accept-Encoding": "gzip"})
+    body = client.get("/metrics").data.decode()
+    assert "http_compression_input_bytes_total" in body
+    assert "http_compression_output_bytes_total" in body
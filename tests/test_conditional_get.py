@@ -0,0 +1,63 @@
+from app import db, Post
+from app.services.posts import add_comment, create_post, delete_post, update_post
+
+
+def _revalidate(client, url):
+    first = client.get(url)
+    assert first.status_code == 200 and first.headers["ETag"]
+    again = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    return first, again
+
+
+def test_api_endpoints_return_304_when_unchanged(client, sample_post):
+    for url in (
+        "/api/posts",
+        "/api/posts?limit=5",
+        f"/api/posts/{sample_post.id}",
+        f"/api/posts/{sample_post.id}/comments",
+        "/api/stats",
+    ):
+        _, again = _revalidate(client, url)
+        assert again.status_code == 304, url
+        assert again.data == b""
+
+
+def test_query_args_change_the_etag(client, sample_post):
+    a = client.get("/api/posts?flair=OTHER").headers["ETag"]
+    b = client.get("/api/posts?flair=TRADE_HELP").headers["ETag"]
+    assert a != b
+
+
+def test_edit_and_comment_change_validators(client, user):
+    post = create_post("v1", "OTHER", "x", user)
+    first, _ = _revalidate(client, f"/api/posts/{post.id}")
+    list_etag = client.get("/api/posts").headers["ETag"]
+
+    update_post(post, "v2", "OTHER", "x")
+    r = client.get(f"/api/posts/{post.id}", headers={"If-None-Match": first.headers["ETag"]})
+    assert r.status_code == 200 and r.get_json()["title"] == "v2"
+
+    comments_etag = client.get(f"/api/posts/{post.id}/comments").headers["ETag"]
+    add_comment(db.session.get(Post, post.id), user, "hot take")
+    r = client.get(f"/api/posts/{post.id}/comments", headers={"If-None-Match": comments_etag})
+    assert r.status_code == 200 and r.get_json()["total"] == 1
+    assert client.get("/api/posts", headers={"If-None-Match": list_etag}).status_code == 200
+
+
+def test_if_modified_since(client, sample_post):
+    r = client.get(f"/api/posts/{sample_post.id}")
+    last_modified = r.headers["Last-Modified"]
+    again = client.get(f"/api/posts/{sample_post.id}", headers={"If-Modified-Since": last_modified})
+    assert again.status_code == 304
+
+
+def test_aggregates_notice_deletes(client, user, sample_post):
+    newer = create_post("Newest", "OTHER", "x", user)
+    r = client.get("/api/stats")
+    assert "Last-Modified" not in r.headers
+    etag = r.headers["ETag"]
+
+    delete_post(db.session.get(Post, sample_post.id))  # the latest updated_at stays the same
+    r = client.get("/api/stats", headers={"If-None-Match": etag,
+                                          "If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+    assert r.status_code == 200 and [p["id"] for p in r.get_json()["latest"]] == [newer.id]
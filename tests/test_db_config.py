@@ -0,0 +1,47 @@
+from sqlalchemy import text
+
+from app import create_app, db
+from app.config import Config
+from app.database import engine_options
+
+
+def _config(**overrides):
+    config = {k: v for k, v in vars(Config).items() if k.isupper()}
+    config.update(overrides)
+    return config
+
+
+def test_engine_options_pool_for_file_sqlite():
+    options = engine_options(_config(SQLALCHEMY_DATABASE_URI="sqlite:///forum.db", DB_POOL_SIZE=8))
+    assert options["pool_size"] == 8
+    assert options["connect_args"] == {"timeout": 15}
+
+
+def test_engine_options_memory_sqlite_has_no_pool_sizing():
+    options = engine_options(_config(SQLALCHEMY_DATABASE_URI="sqlite:///:memory:"))
+    assert "pool_size" not in options
+
+
+def test_engine_options_server_database():
+    options = engine_options(_config(SQLALCHEMY_DATABASE_URI="postgresql://forum@db/forum"))
+    assert options["pool_recycle"] == 1800
+    assert "connect_args" not in options
+
+
+def test_file_sqlite_connections_get_pragmas(tmp_path):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'forum.db'}"})
+    with app.app_context():
+        with db.engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+            assert conn.execute(text("PRAGMA cache_size")).scalar() == -65536
+        db.engine.dispose()
+
+
+def test_database_url_and_prefixed_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'env.db'}")
+    monkeypatch.setenv("FLASK_DB_POOL_SIZE", "12")
+    app = create_app()
+    assert app.config["SQLALCHEMY_DATABASE_URI"].endswith("env.db")
+    assert app.config["SQLALCHEMY_ENGINE_OPTIONS"]["pool_size"] == 12
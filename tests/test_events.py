@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from app.services.events import Cursor, parse_cursor
+from app.services.posts import add_comment, create_post
+
+
+def _frames(body: str):
+    return [f for f in body.split("\n\n") if f]
+
+
+def _events(body: str):
+    events = []
+    for frame in _frames(body):
+        fields = dict(line.split(": ", 1) for line in frame.split("\n"))
+        if "event" in fields:
+            events.append((fields["id"], fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_parse_cursor():
+    assert parse_cursor("12:7") == Cursor(12, 7) and str(Cursor(12, 7)) == "12:7"
+    for value in ("12", "a:1", "1:-1", ":"):
+        with pytest.raises(ValueError):
+            parse_cursor(value)
+
+
+def test_first_poll_only_sets_the_cursor(app, client, sample_post):
+    add_comment(sample_post, sample_post.author, "old")
+    r = client.get("/api/events")
+    assert r.status_code == 200 and r.mimetype == "text/event-stream"
+    assert r.headers["Cache-Control"] == "no-cache"
+    assert _frames(r.get_data(as_text=True)) == ["retry: 5000", f"id: {sample_post.id}:1"]
+
+
+def test_poll_returns_events_after_the_cursor(app, client, user, sample_post):
+    start = f"{sample_post.id}:0"
+    create_post("Live one", "TRADE_HELP", "x", user)
+    create_post("Elsewhere", "OTHER", "x", user)
+    add_comment(sample_post, user, "hot take")
+
+    r = client.get(f"/api/events?channel=flair:TRADE_HELP&channel=post:{sample_post.id}",
+                   headers={"Last-Event-ID": start})
+    events = _events(r.get_data(as_text=True))
+    assert [(e[1], e[2].get("title") or e[2]["content"]) for e in events] == [
+        ("post_created", "Live one"),
+        ("comment_added", "hot take"),
+    ]
+    assert events[1][2]["comment_count"] == 1 and events[1][2]["author"] == "alice"
+    last_id = events[-1][0]
+    assert last_id == f"{sample_post.id + 1}:1"
+
+    # The last id skips nothing the channel missed and repeats nothing it saw.
+    r = client.get("/api/events?channel=feed", headers={"Last-Event-ID": last_id})
+    assert [e[2]["title"] for e in _events(r.get_data(as_text=True))] == ["Elsewhere"]
+    r = client.get("/api/events?channel=feed", headers={"Last-Event-ID": f"{sample_post.id + 2}:1"})
+    assert _frames(r.get_data(as_text=True)) == ["retry: 5000"]
+    assert 'sse_events_sent_total{type="comment_added"}' in client.get("/metrics").data.decode()
+
+
+def test_poll_batches_are_bounded(app, client, user):
+    app.config["SSE_BATCH_SIZE"] = 2
+    posts = [create_post(f"Post {i}", "OTHER", "x", user) for i in range(3)]
+    r = client.get("/api/events?last_event_id=0:0")
+    events = _events(r.get_data(as_text=True))
+    assert [e[2]["id"] for e in events] == [posts[0].id, posts[1].id]
+    r = client.get(f"/api/events?last_event_id={events[-1][0]}")
+    assert [e[2]["id"] for e in _events(r.get_data(as_text=True))] == [posts[2].id]
+
+
+def test_poll_validates_input(client):
+    assert client.get("/api/events?channel=flair:MEMES").status_code == 400
+    assert client.get("/api/events?channel=post:x").status_code == 400
+    assert client.get("/api/events", headers={"Last-Event-ID": "abc"}).status_code == 400
+
+
+def test_pages_include_live_notice(client, sample_post):
+    assert 'data-channel="feed"' in client.get("/home").get_data(as_text=True)
+    assert f'data-channel="post:{sample_post.id}"' in client.get(f"/post/{sample_post.id}").get_data(as_text=True)
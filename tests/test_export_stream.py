@@ -0,0 +1,58 @@
+import gzip
+import json
+from datetime import datetime, timedelta
+
+from app import db, Post
+from app.services.posts import iter_export_posts
+
+
+def _seed(user, count, flair="OTHER"):
+    start = datetime(2024, 9, 1)
+    db.session.add_all([
+        Post(title=f"Export {flair} {i}", flair=flair, content="x", author=user,
+             date_posted=start + timedelta(days=i))
+        for i in range(count)
+    ])
+    db.session.commit()
+
+
+def test_iter_export_posts_batches(user):
+    _seed(user, 5)
+    batches = list(iter_export_posts(batch_size=2))
+    assert [len(b) for b in batches] == [2, 2, 1]
+    titles = [item["title"] for batch in batches for item in batch]
+    assert titles == [f"Export OTHER {i}" for i in range(4, -1, -1)]
+
+
+def test_export_is_streamed_json(client, user):
+    _seed(user, 3)
+    r = client.get("/api/export/posts")
+    assert r.is_streamed
+    data = json.loads(r.data)
+    assert len(data) == 3 and data[0]["content"] == "x"
+
+
+def test_export_empty_json_array(client):
+    assert json.loads(client.get("/api/export/posts").data) == []
+
+
+def test_export_ndjson_with_filters(client, user):
+    _seed(user, 3, flair="OTHER")
+    _seed(user, 2, flair="TRADE_HELP")
+    r = client.get("/api/export/posts?format=ndjson&flair=TRADE_HELP&since=2024-09-02")
+    assert r.mimetype == "application/x-ndjson"
+    assert r.headers["Content-Disposition"].endswith('.ndjson"')
+    lines = [json.loads(line) for line in r.data.decode().splitlines()]
+    assert [item["title"] for item in lines] == ["Export TRADE_HELP 1"]
+
+
+def test_export_gzip(client, user):
+    _seed(user, 2)
+    r = client.get("/api/export/posts?gzip=1")
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert len(json.loads(gzip.decompress(r.data))) == 2
+
+
+def test_export_rejects_bad_params(client):
+    assert client.get("/api/export/posts?format=xml").status_code == 400
+    assert client.get("/api/export/posts?since=yesterday").status_code == 400
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app import db, Post
+from app.services.posts import decode_cursor, encode_cursor, list_posts
+
+
+def _seed(user, count, flair="OTHER"):
+    start = datetime(2024, 9, 1, 12, 0, 0)
+    posts = [
+        Post(title=f"Post {i}", flair=flair, content="x", author=user,
+             date_posted=start + timedelta(minutes=i))
+        for i in range(count)
+    ]
+    db.session.add_all(posts)
+    db.session.commit()
+    return posts
+
+
+def test_cursor_roundtrip(sample_post):
+    stamp, post_id = decode_cursor(encode_cursor(sample_post))
+    assert stamp == sample_post.date_posted
+    assert post_id == sample_post.id
+
+
+def test_feed_pages_older_and_newer(user):
+    _seed(user, 5)
+    first = list_posts(limit=2)
+    assert [p.title for p in first.items] == ["Post 4", "Post 3"]
+    assert first.newer is None and first.older
+
+    second = list_posts(before=first.older, limit=2)
+    assert [p.title for p in second.items] == ["Post 2", "Post 1"]
+    assert second.newer and second.older
+
+    last = list_posts(before=second.older, limit=2)
+    assert [p.title for p in last.items] == ["Post 0"]
+    assert last.older is None
+
+    back = list_posts(after=second.newer, limit=2)
+    assert [p.title for p in back.items] == ["Post 4", "Post 3"]
+    assert back.newer is None
+
+
+def test_feed_ties_on_date_use_id(user):
+    stamp = datetime(2024, 9, 1)
+    db.session.add_all(
+        [Post(title=f"Tie {i}", flair="OTHER", content="x", author=user, date_posted=stamp) for i in range(3)]
+    )
+    db.session.commit()
+    first = list_posts(limit=2)
+    rest = list_posts(before=first.older, limit=2)
+    titles = [p.title for p in first.items + rest.items]
+    assert sorted(titles) == ["Tie 0", "Tie 1", "Tie 2"]
+
+
+def test_feed_keeps_flair_filter_and_ignores_bad_cursor(user):
+    _seed(user, 2, flair="INJURY_TALK")
+    _seed(user, 2, flair="OTHER")
+    page = list_posts("INJURY_TALK", before="not-a-cursor")
+    assert len(page.items) == 2
+    assert all(p.flair == "INJURY_TALK" for p in page.items)
+
+
+def test_home_renders_with_bounded_queries(app, client, user):
+    _seed(user, 30)
+    statements = []
+
+    def count(*args):
+        statements.append(args[2])
+
+    event.listen(db.engine, "before_cursor_execute", count)
+    try:
+        r = client.get("/home")
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count)
+    assert r.status_code == 200
+    assert b"Older" in r.data
+    assert len([s for s in statements if "FROM user" in s and "JOIN" not in s]) == 0
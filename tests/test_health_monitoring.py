@@ -1,3 +1,8 @@
+import os
+import subprocess
+import sys
+
+
 def test_health_endpoint(client):
     response = client.get("/health")
 
@@ -14,3 +19,41 @@ def test_metrics_endpoint(client):
     assert response.status_code == 200
     assert "http_requests_total" in body
     assert "http_request_latency_seconds" in body
+
+
+def test_unmatched_paths_share_one_label(client):
+    client.get("/wp-login.php")
+    client.get("/.env")
+
+    body = client.get("/metrics").data.decode()
+    assert 'endpoint="unmatched"' in body
+    assert "wp-login" not in body and ".env" not in body
+
+
+def test_response_size_and_in_flight_metrics(client):
+    client.get("/about")
+
+    body = client.get("/metrics").data.decode()
+    assert 'http_response_size_bytes_count{endpoint="about"}' in body
+    assert "http_requests_in_flight 1.0" in body  # the scrape itself
+
+
+def test_metrics_merge_worker_processes(tmp_path):
+    script = (
+        "import sys\n"
+        "from app import create_app\n"
+        "app = create_app(dict(TESTING=True, SQLALCHEMY_DATABASE_URI='sqlite:///:memory:'))\n"
+        "client = app.test_client()\n"
+        "if sys.argv[1] == 'scrape':\n"
+        "    print(client.get('/metrics').data.decode())\n"
+        "else:\n"
+        "    client.get('/health')\n"
+    )
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path / "metrics")}
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", script, "hit"], cwd=root, env=env, check=True)
+    scrape = subprocess.run(
+        [sys.executable, "-c", script, "scrape"], cwd=root, env=env, check=True, capture_output=True, text=True
+    )
+    assert 'http_requests_total{endpoint="health",method="GET",status="200"} 2.0' in scrape.stdout
@@ -0,0 +1,63 @@
+from flask import g
+from sqlalchemy import event
+
+from app import db
+from app.services.cache import get_cache
+from app.services.identity import Identity
+from app.services.posts import create_post
+
+
+def _get(client, path):
+    # The fixtures hold one app context open, so forget what earlier requests left in g.
+    g.pop("_login_user", None)
+    g.pop("identities", None)
+    return client.get(path)
+
+
+def _user_queries(fn):
+    statements = []
+
+    def record(*args):
+        statements.append(args[2].lower())
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    return result, [s for s in statements if 'from "user"' in s or "from user" in s]
+
+
+def test_logged_in_requests_reuse_cached_identity(app, login, user):
+    get_cache("identities").clear()
+    r, queries = _user_queries(lambda: _get(login, "/about"))
+    assert r.status_code == 200 and len(queries) == 1
+    assert "password_hash" not in queries[0]
+
+    r, queries = _user_queries(lambda: _get(login, "/about"))
+    assert b"Profile" in r.data and queries == []
+    assert isinstance(get_cache("identities").get(user.id), Identity)
+    assert "identity_cache_hits_total" in login.get("/metrics").data.decode()
+
+
+def test_user_changes_invalidate_identity(app, login, user):
+    _get(login, "/about")
+    assert get_cache("identities").get(user.id).username == "alice"
+
+    user.username = "alice2"
+    db.session.commit()
+    assert get_cache("identities").get(user.id) is None
+    assert b"/user/alice2" in _get(login, "/about").data
+
+    db.session.delete(user)
+    db.session.commit()
+    assert get_cache("identities").get(user.id) is None
+    assert _get(login, "/post/new").status_code == 302
+
+
+def test_ownership_checks_use_identity(login, sample_post, other_user):
+    theirs = create_post("Bob's", "OTHER", "x", other_user)
+    assert _get(login, f"/post/{sample_post.id}/edit").status_code == 200
+    assert isinstance(g._login_user, Identity)
+    assert login.post(f"/post/{theirs.id}/delete").status_code == 403
+    assert login.post(f"/post/{sample_post.id}/delete").status_code == 302
@@ -0,0 +1,103 @@
+import gzip
+import io
+import json
+
+from app import db, Comment, Post
+from app.models import Job
+from app.services.importer import import_posts, iter_lines
+from app.services.jobs import run_pending
+
+GOOD = [
+    {"title": "Archived trade thread", "content": "old board", "author": "alice", "flair": "TRADE_HELP",
+     "date_posted": "2022-09-01T12:00:00",
+     "comments": [{"author": "bob", "content": "accept"}, {"author": "alice", "content": "done"}]},
+    {"title": "Archived sleeper", "content": "deep league", "author": "bob"},
+]
+
+
+def _ndjson(*records):
+    return "\n".join(r if isinstance(r, str) else json.dumps(r) for r in records).encode() + b"\n"
+
+
+def test_api_import_reports_bad_lines_and_keeps_good(app, login, other_user):
+    app.config["IMPORT_ADMINS"] = ("alice",)
+    body = _ndjson(
+        GOOD[0],
+        "{not json",
+        {"title": "x", "content": "y", "author": "nobody"},
+        "",
+        {"title": "x", "content": "y", "author": "bob", "flair": "MEMES"},
+        {"title": "t" * 101, "content": "y", "author": "bob"},
+        {"title": "x", "content": "y", "author": "bob", "comments": [{"author": "bob"}]},
+        GOOD[1],
+    )
+    r = login.post("/api/import/posts", data=body, content_type="application/x-ndjson")
+    report = r.get_json()
+    assert r.status_code == 200
+    assert (report["posts"], report["comments"], report["failed"]) == (2, 2, 5)
+    assert [e["line"] for e in report["errors"]] == [2, 3, 5, 6, 7]
+    assert report["errors"][1]["error"] == "unknown author 'nobody'"
+    assert report["errors"][4]["error"] == "comments[0]: content is required"
+
+    thread = Post.query.filter_by(title="Archived trade thread").one()
+    assert thread.comment_count == 2 and thread.flair == "TRADE_HELP"
+    assert thread.date_posted.year == 2022
+    assert [c.author.username for c in Comment.query.order_by(Comment.id)] == ["bob", "alice"]
+    items = login.get("/api/posts?q=sleeper").get_json()["items"]
+    assert [i["title"] for i in items] == ["Archived sleeper"]
+
+
+def test_api_import_accepts_gzip_and_is_admin_only(app, login, other_user):
+    body = gzip.compress(_ndjson(*GOOD))
+    headers = {"Content-Encoding": "gzip"}
+    assert login.post("/api/import/posts", data=body, headers=headers).status_code == 403
+
+    app.config["IMPORT_ADMINS"] = ("alice",)
+    assert login.post("/api/import/posts", data=body, headers=headers).get_json()["posts"] == 2
+    assert login.post("/api/import/posts", data=b"plain", headers=headers).status_code == 400
+
+
+def test_truncated_gzip_reports_committed_rows(app, login, other_user, monkeypatch):
+    app.config["IMPORT_ADMINS"] = ("alice",)
+    cleared = []
+    monkeypatch.setattr("app.services.importer.invalidate_stats", lambda: cleared.append("stats"))
+    body = gzip.compress(_ndjson(*(GOOD * 50)))
+    app.config["IMPORT_BATCH_SIZE"] = 3
+    r = login.post("/api/import/posts", data=body[: len(body) - 20], headers={"Content-Encoding": "gzip"})
+    report = r.get_json()
+    assert r.status_code == 400 and report["input_error"]
+    assert report["posts"] == Post.query.count() > 0
+    assert report["errors"][-1]["error"] == "input ended unexpectedly"
+    assert cleared == ["stats"]
+
+
+def test_batches_and_error_cap(app, user, other_user):
+    lines = iter_lines(io.BytesIO(_ndjson(*(GOOD * 5), *["bad"] * 4)), 1024)
+    report = import_posts(lines, batch_size=3, max_errors=2).to_dict()
+    assert (report["posts"], report["comments"], report["failed"]) == (10, 10, 4)
+    assert len(report["errors"]) == 2 and report["errors_truncated"]
+    assert db.session.query(Post).count() == 10
+
+
+def test_import_queues_one_search_optimize(app, user, other_user):
+    for _ in range(2):
+        import_posts(iter_lines(io.BytesIO(_ndjson(*GOOD)), 1024))
+    job = db.session.query(Job).one()
+    assert (job.name, job.status) == ("optimize_search_index", "pending")
+    assert run_pending() == {"done": 1}
+    import_posts(iter_lines(io.BytesIO(_ndjson("bad")), 1024))
+    assert db.session.query(Job).count() == 1  # nothing imported, nothing queued
+
+
+def test_overlong_lines_are_skipped(app):
+    stream = io.BytesIO(b'{"a": 1}\n' + b"x" * 50 + b"\n" + b'{"b": 2}\n')
+    assert list(iter_lines(stream, 20)) == [(1, b'{"a": 1}\n'), (2, None), (3, b'{"b": 2}\n')]
+
+
+def test_cli_import(app, user, other_user, tmp_path):
+    path = tmp_path / "archive.ndjson.gz"
+    path.write_bytes(gzip.compress(_ndjson(*GOOD, "oops")))
+    result = app.test_cli_runner().invoke(args=["import-posts", str(path), "--batch-size", "1"])
+    assert result.exit_code == 0
+    assert "Imported 2 post(s) and 2 comment(s); 1 record(s) failed." in result.output
+    assert "line 3: invalid JSON" in result.output
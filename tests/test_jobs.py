@@ -0,0 +1,158 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models import Job, Post
+from app.services import jobs
+from app.services.jobs import JobWorker, claim_jobs, enqueue, job, purge_finished, run_pending, start_worker
+
+CALLS = []
+
+
+@job("test_record")
+def _record(value):
+    CALLS.append(value)
+
+
+@job("test_fail")
+def _fail(message):
+    raise RuntimeError(message)
+
+
+@pytest.fixture(autouse=True)
+def _reset_calls():
+    CALLS.clear()
+
+
+def test_enqueue_is_part_of_the_callers_transaction(app, user):
+    db.session.add(Post(title="Draft", flair="OTHER", content="x", author=user))
+    enqueue("test_record", {"value": 1})
+    db.session.rollback()
+    assert db.session.query(Job).count() == 0 and db.session.query(Post).count() == 0
+
+    db.session.add(Post(title="Kept", flair="OTHER", content="x", author=user))
+    enqueue("test_record", {"value": 2})
+    db.session.commit()
+    row = db.session.query(Job).one()
+    assert row.status == "pending" and row.payload == '{"value": 2}'
+    assert run_pending() == {"done": 1} and CALLS == [2]
+
+    with pytest.raises(KeyError):
+        enqueue("no_such_job", {})
+
+
+def test_run_pending_processes_due_jobs_only(app):
+    enqueue("test_record", {"value": "now"})
+    enqueue("test_record", {"value": "later"}, delay=60)
+    db.session.commit()
+
+    assert run_pending() == {"done": 1}
+    assert CALLS == ["now"]
+    done = db.session.query(Job).filter_by(status="done").one()
+    assert done.attempts == 1 and done.finished_at and done.locked_by is None
+
+    assert run_pending(now=datetime.utcnow() + timedelta(seconds=61)) == {"done": 1}
+    assert CALLS == ["now", "later"]
+
+
+def test_failures_back_off_then_dead_letter(app):
+    app.config.update(JOBS_BACKOFF_BASE=10, JOBS_BACKOFF_MAX=15)
+    row = enqueue("test_fail", {"message": "boom"}, max_attempts=3)
+    db.session.commit()
+
+    now = datetime.utcnow()
+    assert run_pending(now=now) == {"retry": 1}
+    assert row.status == "pending" and row.attempts == 1
+    assert now <= row.run_at <= now + timedelta(seconds=10)
+    assert row.last_error == "RuntimeError: boom"
+
+    assert run_pending(now=now + timedelta(seconds=10)) == {"retry": 1}
+    assert row.run_at <= now + timedelta(seconds=25)  # 20s backoff capped at 15s
+    assert run_pending(now=now + timedelta(seconds=25)) == {"dead": 1}
+    assert row.status == "dead" and row.attempts == 3
+    assert run_pending(now=now + timedelta(days=1)) == {}
+
+
+def test_stale_running_jobs_are_reclaimed(app):
+    row = enqueue("test_record", {"value": 1}, max_attempts=2)
+    db.session.commit()
+    now = datetime.utcnow()
+    assert len(claim_jobs("crashed", 10, lease=60, now=now)) == 1
+    assert claim_jobs("other", 10, lease=60, now=now + timedelta(seconds=30)) == []
+    assert len(claim_jobs("other", 10, lease=60, now=now + timedelta(seconds=61))) == 1
+    assert row.locked_by == "other" and row.attempts == 1
+    assert row.last_error.startswith("lease expired")
+
+    # A job that keeps killing its worker is dead-lettered, not retried forever.
+    assert claim_jobs("third", 10, lease=60, now=now + timedelta(seconds=122)) == []
+    assert row.status == "dead" and row.attempts == 2
+
+
+def test_idle_polls_only_read(app):
+    enqueue("test_record", {"value": 1})
+    db.session.commit()
+    run_pending()
+    enqueue("test_record", {"value": 2}, delay=60)
+    db.session.commit()
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement.split(None, 1)[0].upper())
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        assert claim_jobs("idle", 10, lease=60) == []
+        assert purge_finished(older_than=3600) == 0
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    assert statements and set(statements) == {"SELECT"}
+
+    assert purge_finished(older_than=-1) == 1
+    assert [r.status for r in db.session.query(Job)] == ["pending"]
+
+
+def test_no_worker_without_handlers(app, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_HANDLERS", {})
+    assert start_worker(app) is None and "job_worker" not in app.extensions
+
+
+def test_queue_metrics_are_exposed(app, client):
+    enqueue("test_record", {"value": 1})
+    enqueue("test_fail", {"message": "x"}, max_attempts=1)
+    db.session.commit()
+    run_pending()
+    assert jobs.refresh_queue_depth() == {"done": 1, "dead": 1}
+
+    body = client.get("/metrics").data.decode()
+    assert 'jobs_queue_depth{status="dead"} 1.0' in body
+    assert 'jobs_processed_total{name="test_fail",outcome="dead"}' in body
+    assert "jobs_latency_seconds_bucket" in body and "jobs_duration_seconds_bucket" in body
+
+
+def test_worker_threads_process_jobs(tmp_path):
+    app = create_app(dict(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'jobs.db'}",
+        JOBS_POLL_INTERVAL=0.01,
+    ))
+    with app.app_context():
+        db.create_all()
+        for value in range(5):
+            enqueue("test_record", {"value": value})
+        db.session.commit()
+
+    worker = JobWorker(app, threads=2, poll_interval=0.01).start()
+    try:
+        deadline = time.monotonic() + 5
+        while len(CALLS) < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        worker.stop(timeout=5)
+
+    assert sorted(CALLS) == list(range(5))
+    with app.app_context():
+        assert {row.status for row in db.session.query(Job)} == {"done"}
+        db.engine.dispose()
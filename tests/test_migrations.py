@@ -0,0 +1,69 @@
+from sqlalchemy import inspect, text
+
+from app import db
+from app.migrations import MIGRATIONS, prepare_database, run_migrations
+
+
+def _legacy_schema():
+    """Replace the post table with its original shape: no flair, counter or indexes."""
+
+    with db.engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS schema_migrations"))
+        conn.execute(text("DROP TABLE IF EXISTS post_fts"))
+        conn.execute(text("DROP TABLE post"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_comment_post_id_date_posted"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_comment_post_id_date_posted_id"))
+        conn.execute(text(
+            "CREATE TABLE post (id INTEGER PRIMARY KEY, title VARCHAR(100) NOT NULL, "
+            "date_posted DATETIME NOT NULL, content TEXT NOT NULL, user_id INTEGER NOT NULL)"
+        ))
+        conn.execute(text(
+            "INSERT INTO post (id, title, date_posted, content, user_id) "
+            "VALUES (1, 'Legacy sleeper', '2023-08-01 10:00:00', 'old board', 1)"
+        ))
+        for i in range(2):
+            conn.execute(text(
+                "INSERT INTO comment (content, date_posted, user_id, post_id) "
+                f"VALUES ('c{i}', '2023-08-02 10:00:00', 1, 1)"
+            ))
+
+
+def test_fresh_schema_records_all_versions(app):
+    assert run_migrations() == [m.version for m in MIGRATIONS]
+    assert run_migrations() == []
+    assert prepare_database() == []
+
+
+def test_upgrades_legacy_database(client, user):
+    _legacy_schema()
+    assert run_migrations() == [1, 2, 3, 4, 5, 6, 7]
+
+    inspector = inspect(db.engine)
+    columns = {c["name"] for c in inspector.get_columns("post")}
+    assert {"flair", "comment_count"} <= columns
+    post_indexes = {ix["name"] for ix in inspector.get_indexes("post")}
+    assert {"ix_post_flair_date_posted", "ix_post_user_id_date_posted"} <= post_indexes
+    comment_indexes = {ix["name"] for ix in inspector.get_indexes("comment")}
+    assert "ix_comment_post_id_date_posted_id" in comment_indexes
+    assert "ix_comment_post_id_date_posted" not in comment_indexes
+
+    item = client.get("/api/posts?q=sleeper").get_json()["items"][0]
+    assert item["comments_count"] == 2 and item["flair"] == "OTHER"
+
+
+def test_feed_query_uses_index(app):
+    run_migrations()
+    plan = db.session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM post WHERE flair = 'OTHER' "
+        "ORDER BY date_posted DESC LIMIT 20"
+    )).fetchall()
+    detail = " ".join(row[-1] for row in plan)
+    assert "ix_post_flair_date_posted" in detail
+    assert "TEMP B-TREE" not in detail
+
+
+def test_db_upgrade_command(app):
+    result = app.test_cli_runner().invoke(args=["db-upgrade"])
+    assert "Applied migrations: 1, 2, 3, 4, 5" in result.output
+    result = app.test_cli_runner().invoke(args=["db-upgrade"])
+    assert "up to date" in result.output
@@ -0,0 +1,68 @@
+from sqlalchemy import event
+
+from app import db
+from app.services.cache import get_cache
+from app.services.posts import add_comment, create_post
+
+
+def _queries(fn):
+    statements = []
+
+    def record(*args):
+        statements.append(args[2])
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    return result, len(statements)
+
+
+def test_anonymous_home_served_from_cache(client, user):
+    create_post("Cached title", "OTHER", "x", user)
+    first = client.get("/home")
+    second, queries = _queries(lambda: client.get("/home"))
+    assert queries == 0
+    assert second.data == first.data
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert "no-cache" in second.headers["Cache-Control"]
+    assert "Cookie" in second.headers["Vary"]
+
+
+def test_etag_revalidation_returns_304(client, sample_post):
+    etag = client.get(f"/post/{sample_post.id}").headers["ETag"]
+    r = client.get(f"/post/{sample_post.id}", headers={"If-None-Match": etag})
+    assert r.status_code == 304 and r.data == b""
+
+
+def test_writes_invalidate_affected_pages(client, user, sample_post):
+    client.get("/home")
+    client.get(f"/post/{sample_post.id}")
+    client.get(f"/user/{user.username}")
+
+    create_post("Fresh take", "OTHER", "x", user)
+    assert b"Fresh take" in client.get("/home").data
+    assert b"Fresh take" in client.get(f"/user/{user.username}").data
+
+    add_comment(sample_post, user, "new comment body")
+    assert b"new comment body" in client.get(f"/post/{sample_post.id}").data
+
+
+def test_logged_in_users_bypass_cache(login, sample_post):
+    r = login.get("/home")
+    assert "ETag" not in r.headers
+    assert len(get_cache("pages")) == 0
+
+
+def test_cache_is_bounded_and_reports_metrics(app, client, sample_post):
+    app.extensions["caches"]["pages"].maxsize = 2
+    for flair in ("OTHER", "TRADE_HELP", "INJURY_TALK"):
+        client.get(f"/home?flair={flair}")
+    client.get("/home?flair=INJURY_TALK")
+    assert len(get_cache("pages")) == 2
+
+    body = client.get("/metrics").data.decode()
+    assert "page_cache_hits_total" in body
+    assert "page_cache_misses_total" in body
+    assert "page_cache_evictions_total" in body
@@ -0,0 +1,80 @@
+import threading
+
+import pytest
+
+from app import db, User
+from app.services.hashing import HashingBusy, PasswordHasher, get_hasher
+
+
+def test_login_upgrades_outdated_hash(app, client, user):
+    app.extensions["password_hasher"] = PasswordHasher("pbkdf2:sha256:1000", 1, 1, 5)
+    assert user.password_hash.startswith("scrypt:")
+
+    r = client.post("/login", data={"email": "alice@example.com", "password": "password123"})
+    assert r.status_code == 302
+    assert db.session.get(User, user.id).password_hash.startswith("pbkdf2:sha256:1000$")
+
+    client.get("/logout")
+    r = client.post("/login", data={"email": "alice@example.com", "password": "password123"})
+    assert r.status_code == 302
+
+
+def test_register_hashes_with_configured_method(app, client):
+    app.extensions["password_hasher"] = PasswordHasher("pbkdf2:sha256:1000", 1, 1, 5)
+    client.post("/register", data={
+        "username": "carol", "email": "carol@example.com",
+        "password": "password123", "confirm_password": "password123",
+    })
+    assert User.query.filter_by(username="carol").one().password_hash.startswith("pbkdf2:sha256:1000$")
+
+
+def test_saturated_pool_fails_fast(app, client, user):
+    hasher = PasswordHasher("pbkdf2:sha256:1000", max_workers=1, max_queue=0, timeout=5)
+    app.extensions["password_hasher"] = hasher
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    worker = threading.Thread(target=hasher.run, args=("hash", block))
+    worker.start()
+    try:
+        started.wait(5)
+        with pytest.raises(HashingBusy):
+            get_hasher().hash("x")
+        r = client.post("/login", data={"email": "alice@example.com", "password": "password123"})
+        assert r.status_code == 503
+        assert r.headers["Retry-After"] == "2"
+        assert b"try again" in r.data
+    finally:
+        release.set()
+        worker.join()
+    assert hasher.verify(hasher.hash("x"), "x")
+
+
+def test_slow_hash_times_out_as_busy(app, client, user):
+    hasher = PasswordHasher("pbkdf2:sha256:1000", max_workers=1, max_queue=1, timeout=0.05)
+    app.extensions["password_hasher"] = hasher
+    release = threading.Event()
+
+    def occupy_pool():
+        with pytest.raises(HashingBusy):
+            hasher.run("hash", release.wait, 5)
+
+    worker = threading.Thread(target=occupy_pool)
+    worker.start()
+    try:
+        r = client.post("/login", data={"email": "alice@example.com", "password": "password123"})
+        assert r.status_code == 503 and r.headers["Retry-After"] == "2"
+    finally:
+        release.set()
+        worker.join()
+
+
+def test_needs_rehash_compares_the_configured_method():
+    hasher = PasswordHasher("scrypt", 1, 0, 5)
+    assert not hasher.needs_rehash("scrypt:32768:8:1$salt$hash")
+    assert hasher.needs_rehash("pbkdf2:sha256:600000$salt$hash")
+    assert PasswordHasher("pbkdf2", 1, 0, 5).needs_rehash("pbkdf2:sha256:600000$salt$hash")
@@ -0,0 +1,58 @@
+from sqlalchemy import event
+
+from app import db, Comment
+from app.services.posts import COMMENTS_PAGE_SIZE
+
+
+def _seed(post, users, count):
+    db.session.add_all([
+        Comment(content=f"comment-{i:03d}", author=users[i % 2], post=post) for i in range(count)
+    ])
+    post.comment_count = count
+    db.session.commit()
+
+
+def _count_queries(fn):
+    statements = []
+
+    def record(*args):
+        statements.append(args[2])
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    return result, statements
+
+
+def test_detail_renders_first_page_with_bounded_queries(client, sample_post, user, other_user):
+    _seed(sample_post, [user, other_user], COMMENTS_PAGE_SIZE + 5)
+    r, statements = _count_queries(lambda: client.get(f"/post/{sample_post.id}"))
+    page = r.get_data(as_text=True)
+    assert f"Comments ({COMMENTS_PAGE_SIZE + 5})" in page
+    assert page.count("comment-") == COMMENTS_PAGE_SIZE
+    assert f"comment-{COMMENTS_PAGE_SIZE:03d}" not in page
+    assert 'id="loadMoreComments"' in page
+    assert len(statements) <= 4
+
+
+def test_load_more_fragment_continues_the_thread(client, sample_post, user, other_user):
+    _seed(sample_post, [user, other_user], COMMENTS_PAGE_SIZE + 5)
+    page = client.get(f"/post/{sample_post.id}").get_data(as_text=True)
+    after = page.split('data-after="', 1)[1].split('"', 1)[0]
+
+    r = client.get(f"/post/{sample_post.id}/comments?after={after}")
+    fragment = r.get_data(as_text=True)
+    assert fragment.count("comment-") == 5
+    assert f"comment-{COMMENTS_PAGE_SIZE:03d}" in fragment
+    assert "X-Next-Cursor" not in r.headers
+
+    assert client.get(f"/post/{sample_post.id}/comments?after=bogus").status_code == 400
+
+
+def test_short_thread_has_no_load_more(client, sample_post, user):
+    _seed(sample_post, [user, user], 2)
+    page = client.get(f"/post/{sample_post.id}").get_data(as_text=True)
+    assert page.count("comment-") == 2
+    assert 'id="loadMoreComments"' not in page
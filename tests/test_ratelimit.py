@@ -0,0 +1,109 @@
+import pytest
+
+from app import create_app, db
+from app.services.ratelimit import MemoryBackend, RateLimiter, SQLiteBackend, parse_rule
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_rule():
+    assert parse_rule("30/minute") == (0.5, 30)
+    assert parse_rule("2/seconds") == (2.0, 2)
+    for bad in ("30", "x/minute", "5/fortnight", "0/hour"):
+        with pytest.raises(ValueError):
+            parse_rule(bad)
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_bucket_refills_over_time(backend, tmp_path):
+    store = MemoryBackend() if backend == "memory" else SQLiteBackend(str(tmp_path / "rl.db"))
+    clock = FakeClock()
+    limiter = RateLimiter(store, {"search": "2/minute"}, clock=clock)
+
+    assert limiter.hit("search", "ip:1") == (True, 0.0)
+    assert limiter.hit("search", "ip:1")[0]
+    allowed, retry_after = limiter.hit("search", "ip:1")
+    assert not allowed and retry_after == pytest.approx(30)
+    assert limiter.hit("search", "ip:2")[0]
+    assert limiter.hit("other", "ip:1") == (True, 0.0)
+
+    clock.now += 30
+    assert limiter.hit("search", "ip:1")[0]
+    assert not limiter.hit("search", "ip:1")[0]
+
+
+def test_sqlite_buckets_are_shared_between_instances(tmp_path):
+    path = str(tmp_path / "rl.db")
+    clock = FakeClock()
+    first = RateLimiter(SQLiteBackend(path), {"export": "1/hour"}, clock=clock)
+    second = RateLimiter(SQLiteBackend(path), {"export": "1/hour"}, clock=clock)
+    assert first.hit("export", "ip:1")[0]
+    assert not second.hit("export", "ip:1")[0]
+
+
+def test_memory_backend_is_bounded():
+    store = MemoryBackend(max_keys=2)
+    for key in "abc":
+        store.consume(key, 1.0, 1, 0.0)
+    assert list(store._buckets) == ["b", "c"]
+
+
+def test_search_and_export_return_429(app, client, sample_post):
+    app.extensions["ratelimiter"] = RateLimiter(MemoryBackend(), {"search": "2/minute", "export": "1/hour"})
+    assert client.get("/api/posts?q=hello").status_code == 200
+    assert client.get("/api/posts?q=hello").status_code == 200
+    r = client.get("/api/posts?q=hello")
+    assert r.status_code == 429 and r.get_json() == {"error": "rate limit exceeded"}
+    assert r.headers["Retry-After"] == "30"
+    assert client.get("/api/posts").status_code == 200
+
+    assert client.get("/api/export/posts").status_code == 200
+    assert client.get("/api/export/posts").status_code == 429
+
+    body = client.get("/metrics").data.decode()
+    assert "ratelimit_requests_total" in body
+
+
+def test_writes_are_limited_per_user(app, login, sample_post):
+    app.extensions["ratelimiter"] = RateLimiter(MemoryBackend(), {"write": "1/minute"})
+    assert login.get("/post/new").status_code == 200
+    assert login.post(f"/post/{sample_post.id}/comment", data={"content": "one"}).status_code == 302
+    r = login.post(f"/post/{sample_post.id}/comment", data={"content": "two"})
+    assert r.status_code == 429 and int(r.headers["Retry-After"]) == 60
+    assert list(app.extensions["ratelimiter"].backend._buckets) == [
+        "write:ip:127.0.0.1", f"write:user:{sample_post.user_id}"
+    ]
+
+
+def test_signed_in_requests_also_draw_on_the_ip_bucket(app, client, user, other_user, sample_post):
+    app.extensions["ratelimiter"] = RateLimiter(MemoryBackend(), {"write": "1/minute"})
+    client.post("/login", data={"email": "alice@example.com", "password": "password123"})
+    assert client.post(f"/post/{sample_post.id}/comment", data={"content": "one"}).status_code == 302
+    client.get("/logout")
+    client.post("/login", data={"email": "bob@example.com", "password": "password123"})
+    assert client.post(f"/post/{sample_post.id}/comment", data={"content": "two"}).status_code == 429
+
+
+def test_trusted_proxy_sets_the_client_ip():
+    app = create_app(dict(
+        TESTING=True, SQLALCHEMY_DATABASE_URI="sqlite:///:memory:", TRUSTED_PROXY_COUNT=1,
+    ))
+    app.extensions["ratelimiter"] = RateLimiter(MemoryBackend(), {"export": "1/hour"})
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    assert client.get("/api/export/posts", headers={"X-Forwarded-For": "10.0.0.1"}).status_code == 200
+    assert client.get("/api/export/posts", headers={"X-Forwarded-For": "10.0.0.2"}).status_code == 200
+    assert client.get("/api/export/posts", headers={"X-Forwarded-For": "10.0.0.1"}).status_code == 429
+
+
+def test_disabled(app, client, sample_post):
+    app.config["RATELIMIT_ENABLED"] = False
+    app.extensions["ratelimiter"] = RateLimiter(MemoryBackend(), {"export": "1/hour"})
+    assert all(client.get("/api/export/posts").status_code == 200 for _ in range(3))
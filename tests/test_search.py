@@ -0,0 +1,73 @@
+from sqlalchemy import event, text
+
+from app import db, Post
+from app.services.posts import delete_post, update_post
+from app.services.search import forget_search_availability, fts_query, search_available
+
+
+def _titles(client, query):
+    return [item["title"] for item in client.get(f"/api/posts?{query}").get_json()["items"]]
+
+
+def test_index_follows_writes(client, user):
+    post = Post(title="Bijan breakout", flair="OTHER", content="rookie rb", author=user)
+    db.session.add(post)
+    db.session.commit()
+    assert search_available()
+    assert _titles(client, "q=bijan") == ["Bijan breakout"]
+
+    update_post(post, "Puka ceiling", "OTHER", "wr upside")
+    assert _titles(client, "q=bijan") == []
+    assert _titles(client, "q=puka") == ["Puka ceiling"]
+
+    delete_post(post)
+    assert _titles(client, "q=puka") == []
+
+
+def test_prefix_and_bm25_ranking(client, user):
+    db.session.add_all([
+        Post(title="Weekly thread", flair="OTHER", content="one mention of waivers", author=user),
+        Post(title="Waivers waivers", flair="WAIVER_WIRE", content="waiver wire waivers", author=user),
+    ])
+    db.session.commit()
+    assert _titles(client, "q=waiv") == ["Waivers waivers", "Weekly thread"]
+
+
+def test_snippets_are_escaped_and_marked(client, user):
+    db.session.add(Post(title="Trade", flair="OTHER", content="<b>sell</b> high on Kelce", author=user))
+    db.session.commit()
+    item = client.get("/api/posts?q=kelce&snippets=1").get_json()["items"][0]
+    assert "<mark>Kelce</mark>" in item["snippet"]
+    assert "&lt;b&gt;" in item["snippet"]
+
+
+def test_fallback_to_like_without_index(client, user):
+    db.session.add(Post(title="Handcuff ranks", flair="OTHER", content="x", author=user))
+    db.session.commit()
+    assert search_available()
+    db.session.execute(text("DROP TABLE post_fts"))
+    db.session.commit()
+    assert search_available()  # cached; raw DDL is not noticed on its own
+    forget_search_availability()
+    assert not search_available()
+    assert _titles(client, "q=cuff") == ["Handcuff ranks"]
+
+
+def test_fts_query_quotes_tokens():
+    assert fts_query('rb "OR" te-') == '"rb"* "OR"* "te"*'
+    assert fts_query("!!") is None
+
+
+def test_availability_is_looked_up_once(app, client, user):
+    assert search_available()
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        client.get("/api/posts?q=bijan&snippets=1")
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    assert statements and not [sql for sql in statements if "sqlite_master" in sql]
@@ -0,0 +1,41 @@
+from sqlalchemy import inspect
+
+from app import __main__ as entry
+from app import db
+from app.server import load_app, server_options
+
+
+def test_server_options_from_env():
+    options = server_options(
+        {"PORT": "8080", "WEB_CONCURRENCY": "3", "GUNICORN_THREADS": "8", "GUNICORN_MAX_REQUESTS": "50"}
+    )
+    assert options["bind"] == "0.0.0.0:8080"
+    assert options["workers"] == 3 and options["threads"] == 8
+    assert options["max_requests"] == 50
+    assert options["preload_app"] is True and options["worker_class"] == "gthread"
+
+
+def test_server_options_defaults_scale_with_cpus(monkeypatch):
+    monkeypatch.setattr("app.server.multiprocessing.cpu_count", lambda: 4)
+    options = server_options({}, workers=None, bind="127.0.0.1:9000")
+    assert options["workers"] == 9
+    assert options["bind"] == "127.0.0.1:9000"
+
+
+def test_load_app_migrates_database(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'serve.db'}")
+    app = load_app()
+    with app.app_context():
+        assert "schema_migrations" in inspect(db.engine).get_table_names()
+        assert app.debug is False
+        db.engine.dispose()
+
+
+def test_main_dispatches_serve(monkeypatch):
+    calls = []
+    monkeypatch.setattr(entry, "serve", lambda **kw: calls.append(("serve", kw)))
+    monkeypatch.setattr(entry, "serve_dev", lambda host, port: calls.append(("dev", host, port)))
+    entry.main(["serve", "--workers", "2"])
+    entry.main(["serve", "--dev"])
+    assert calls[0] == ("serve", {"bind": None, "workers": 2, "threads": None})
+    assert calls[1][0] == "dev"
@@ -0,0 +1,62 @@
+import logging
+
+from sqlalchemy import text
+
+from app import db, Comment, Post, User
+
+
+def _seed(user, posts=15, comments=15):
+    # Distinct authors, so a per-row author load would show up as repeated SELECTs.
+    authors = [User(username=f"u{i}", email=f"u{i}@example.com", password_hash="x") for i in range(posts)]
+    post = Post(title="Busy thread", flair="OTHER", content="x", author=user)
+    db.session.add_all([post] + [
+        Post(title=f"Post {i}", flair="OTHER", content="x", author=authors[i]) for i in range(posts)
+    ])
+    db.session.add_all([Comment(content=f"c{i}", author=authors[i], post=post) for i in range(comments)])
+    post.comment_count = comments
+    db.session.commit()
+    return post
+
+
+def test_server_timing_header(app, client, user):
+    app.config["SQL_SERVER_TIMING"] = True
+    r = client.get("/home")
+    timing = r.headers["Server-Timing"]
+    assert timing.startswith("db;dur=") and 'queries"' in timing
+
+    app.config["SQL_SERVER_TIMING"] = False
+    assert "Server-Timing" not in client.get("/about").headers
+
+
+def test_repeated_statement_flagged_as_n_plus_one(app, client, caplog):
+    @app.get("/_loop")
+    def loop():
+        for _ in range(app.config["SQL_N_PLUS_ONE_THRESHOLD"]):
+            db.session.execute(text("SELECT 1"))
+        return "ok"
+
+    with caplog.at_level(logging.WARNING, logger="app.services.sqlstats"):
+        client.get("/_loop")
+    assert any("possible N+1 on loop: 10 x SELECT 1" in r.message for r in caplog.records)
+    assert 'db_n_plus_one_total{endpoint="loop"} 1.0' in client.get("/metrics").data.decode()
+
+
+def test_hot_pages_have_no_n_plus_one(app, client, user, caplog):
+    post = _seed(user)
+    with caplog.at_level(logging.WARNING, logger="app.services.sqlstats"):
+        for path in ("/home", f"/post/{post.id}", "/user/alice", "/api/posts",
+                     "/api/posts?q=post", "/api/posts?q=post&limit=20",
+                     f"/api/posts/{post.id}/comments", "/api/stats"):
+            assert client.get(path).status_code == 200
+    assert not [r for r in caplog.records if "N+1" in r.message]
+
+
+def test_slow_queries_logged_without_parameters(app, client, user, caplog):
+    app.config["SQL_SLOW_QUERY_MS"] = 0
+    with caplog.at_level(logging.WARNING, logger="app.sql.slow"):
+        client.get("/api/posts?q=secretterm")
+    slow = [r.message for r in caplog.records if r.name == "app.sql.slow"]
+    assert slow and all("GET /api/posts" in m for m in slow)
+    assert not any("secretterm" in m for m in slow)
+    body = client.get("/metrics").data.decode()
+    assert "db_queries_per_request_bucket" in body and "db_slow_queries_total" in body
@@ -0,0 +1,57 @@
+from sqlalchemy import event
+
+from app import db, Post
+from app.services.cache import TTLCache
+from app.services.posts import create_post, delete_post, stats_payload, update_post
+
+
+def _count_queries(app, fn):
+    statements = []
+
+    def record(*args):
+        statements.append(args[2])
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    return len(statements)
+
+
+def test_stats_counts_in_one_group_by(app, user):
+    create_post("a", "TRADE_HELP", "x", user)
+    create_post("b", "TRADE_HELP", "x", user)
+    create_post("c", "INJURY_TALK", "x", user)
+
+    assert _count_queries(app, stats_payload) == 2
+    counts = stats_payload()["counts"]
+    assert counts == {"TRADE_HELP": 2, "WAIVER_WIRE": 0, "INJURY_TALK": 1, "OTHER": 0, "TOTAL": 3}
+    assert _count_queries(app, stats_payload) == 0
+
+
+def test_post_writes_invalidate_stats(client, user):
+    post = create_post("first", "OTHER", "x", user)
+    assert client.get("/api/stats").get_json()["counts"]["OTHER"] == 1
+
+    update_post(post, "renamed", "WAIVER_WIRE", "x")
+    data = client.get("/api/stats").get_json()
+    assert data["counts"]["WAIVER_WIRE"] == 1
+    assert data["latest"][0]["title"] == "renamed"
+
+    delete_post(db.session.get(Post, post.id))
+    assert client.get("/api/stats").get_json()["counts"]["TOTAL"] == 0
+
+
+def test_ttl_cache_expiry_and_lru(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.services.cache.time.monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1
+
+    now[0] += 11
+    assert cache.get("a") is None
@@ -0,0 +1,76 @@
+import threading
+
+from app import create_app
+from app.services.monitoring import BatchingSpanExporter, configure_application_insights
+
+
+class RecordingExporter:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.sent = threading.Event()
+
+    def emit(self, span_datas):
+        self.batches.append(list(span_datas))
+        self.sent.set()
+        if self.fail:
+            raise RuntimeError("ingestion down")
+
+
+def test_tracing_off_without_connection_string(app):
+    assert configure_application_insights(app) is None
+    assert "span_exporter" not in app.extensions
+
+
+def test_batches_and_drops_when_full():
+    inner = RecordingExporter()
+    exporter = BatchingSpanExporter(inner, max_queue_size=3, batch_size=2, interval=60)
+    exporter._stopped.set()  # keep the background thread out of the way
+    exporter.export(["a", "b", "c", "d"])
+    exporter.flush()
+    assert [span for batch in inner.batches for span in batch] == ["a", "b", "c"]
+    assert all(len(batch) <= 2 for batch in inner.batches)
+
+
+def test_background_thread_survives_export_failure():
+    inner = RecordingExporter(fail=True)
+    exporter = BatchingSpanExporter(inner, batch_size=10, interval=0.05)
+    exporter.export(["span"])
+    assert inner.sent.wait(2)
+    exporter.shutdown()
+    assert inner.batches == [["span"]]
+
+
+def test_tracing_installed_with_connection_string():
+    app = create_app({
+        "APPLICATIONINSIGHTS_CONNECTION_STRING": (
+            "InstrumentationKey=00000000-0000-0000-0000-000000000000;"
+            "IngestionEndpoint=http://127.0.0.1:9/"
+        ),
+        "TRACING_SAMPLE_RATE": 1.0,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+    })
+    exporter = app.extensions["span_exporter"]
+    assert app.test_client().get("/health").status_code == 200
+    exporter.shutdown()
+
+    body = app.test_client().get("/metrics").data.decode()
+    assert "tracing_spans_queued_total" in body
+
+
+def test_exporter_thread_starts_in_the_exporting_process(monkeypatch):
+    inner = RecordingExporter()
+    exporter = BatchingSpanExporter(inner, interval=0.05)
+    assert exporter._thread is None  # nothing started at app creation, before a fork
+
+    exporter.export(["parent"])
+    parent_thread = exporter._thread
+    assert inner.sent.wait(2)
+
+    monkeypatch.setattr("app.services.monitoring.os.getpid", lambda: exporter._pid + 1)
+    inner.sent.clear()
+    exporter.export(["child"])
+    assert exporter._thread is not parent_thread and exporter._thread.is_alive()
+    assert inner.sent.wait(2)
+    exporter.shutdown()
+    assert inner.batches[-1] == ["child"]